@@ -3,7 +3,6 @@
 提供实验的完整生命周期管理功能，包括状态管理、日志记录、指标保存等。
 """
 import csv
-import json
 import os
 import subprocess
 import threading
@@ -11,8 +10,8 @@ import traceback
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
-import pandas as pd
 from experiment_manager.core.status import ExperimentStatus
+from experiment_manager.utils import jsonio
 from experiment_manager.integrations.lark.sync_utils import (
     coerce_lark_config_input,
     expand_lark_config,
@@ -24,6 +23,27 @@ from zoneinfo import ZoneInfo
 
 LOCAL_TZ = ZoneInfo("Asia/Shanghai")
 
+
+def _max_run_number(log_dir: Path) -> int:
+    """扫描 terminal_logs 目录, 返回已有 run_XXXX.log 的最大编号 (没有则为 0)"""
+    max_run_num = 0
+    # 直接用 os.scandir 拿文件名字符串, 不为每个条目构造 Path 对象
+    with os.scandir(log_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith("run_") and name.endswith(".log")):
+                continue
+            try:
+                # 从文件名提取运行编号：run_0001.log -> 1
+                run_num = int(name[:-4].split('_')[1])  # run_0001 -> 0001
+            except (ValueError, IndexError):
+                # 忽略无法解析的文件名
+                continue
+            if run_num > max_run_num:
+                max_run_num = run_num
+    return max_run_num
+
+
 class Experiment:
     """实验管理类"""
 
@@ -41,13 +61,13 @@ class Experiment:
     ):
         self.name = name
         self.command = command
-        self.tags = tags or []
+        self.tags = list(tags) if tags else []
         self.cwd = Path(cwd) if cwd else None  # 添加自定义工作目录
         self.description = description
 
         # 进程管理
         self.pid: Optional[int] = None
-        self.gpu_ids: List[int] = gpu_ids or []  # 直接使用用户指定的GPU ID
+        self.gpu_ids: List[int] = list(gpu_ids) if gpu_ids else []  # 直接使用用户指定的GPU ID (统一转为 list, 调用方可传入 tuple)
         if base_dir is None:
             raise ValueError("base_dir 参数是必传的，请指定实验输出根目录")
         self.base_dir = Path(base_dir)
@@ -118,16 +138,7 @@ class Experiment:
         if not log_dir.exists():
             log_dir.mkdir(parents=True, exist_ok=True)
         
-        max_run_num = 0
-        for log_file in log_dir.glob("run_*.log"):
-            try:
-                # 从文件名提取运行编号：run_0001.log -> 1
-                run_num_str = log_file.stem.split('_')[1]  # run_0001 -> 0001
-                run_num = int(run_num_str)
-                max_run_num = max(max_run_num, run_num)
-            except (ValueError, IndexError):
-                # 忽略无法解析的文件名
-                continue
+        max_run_num = _max_run_number(log_dir)
         
         # 下一个运行编号
         next_run_num = max_run_num + 1
@@ -163,7 +174,8 @@ class Experiment:
             "name": self.name,
             "command": self.command,
             "tags": self.tags,
-            "timestamp": self.timestamp.astimezone(LOCAL_TZ).isoformat(),
+            # 固定输出 6 位微秒: 格式统一后既能按字符串比较先后, 读取时也总能走 fromisoformat
+            "timestamp": self.timestamp.astimezone(LOCAL_TZ).isoformat(timespec="microseconds"),
             "status": self.status.value,
             "pid": self.pid,
             "gpu_ids": self.gpu_ids,
@@ -172,8 +184,8 @@ class Experiment:
             "description": self.description,
             "lark_config": self.lark_config,
         }
-        with open(self.work_dir / "metadata.json", "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        # 一次编码为字节后写临时文件再原子替换, UI 或调度器并发读取时不会读到写了一半的内容
+        jsonio.dump_file(self.work_dir / "metadata.json", metadata, indent=True)
     
     @classmethod
     def load_from_dir(cls, work_dir: Path) -> "Experiment":
@@ -193,15 +205,15 @@ class Experiment:
         if not metadata_file.exists():
             raise FileNotFoundError(f"Metadata file not found: {metadata_file}")
             
-        with open(metadata_file, "r", encoding="utf-8") as f:
-            metadata = json.load(f)
+        metadata = jsonio.loads(metadata_file.read_bytes())
 
         # 绕过 __init__ 创建实例
         exp = cls.__new__(cls)
         exp.name = metadata["name"]
         exp.command = metadata["command"]
         exp.tags = metadata["tags"]
-        exp.timestamp = datetime.fromisoformat(metadata["timestamp"])
+        # Python 3.11 之前的 fromisoformat 不认 "Z" 后缀, 换成等价的 +00:00
+        exp.timestamp = datetime.fromisoformat(metadata["timestamp"].replace("Z", "+00:00"))
         exp.status = ExperimentStatus(metadata["status"])
         exp.pid = metadata.get("pid")
         exp.gpu_ids = metadata.get("gpu_ids", [])
@@ -259,6 +271,12 @@ class Experiment:
         if error_msg:
             self.append_log(f"ERROR: {error_msg}")
         self._save_metadata()
+
+    def output_drained(self) -> bool:
+        """后台输出线程是否已结束 (输出已全部记录, 最终状态已写入); 未以后台模式运行时恒为 True"""
+        # load_from_dir 绕过了 __init__, 实例上不一定有该属性
+        output_thread = getattr(self, "_output_thread", None)
+        return output_thread is None or not output_thread.is_alive()
     
     def run(self, background: bool = True, extra_env: Optional[Dict[str, str]] = None):
         """运行实验
@@ -591,6 +609,8 @@ class Experiment:
         """
         加载指标数据为DataFrame
         """
+        import pandas as pd  # pandas 导入很慢且只有这里用到, 用到时再导入
+
         metrics_file = self.get_metrics_file_path()
         if not metrics_file.exists():
             return []
@@ -606,18 +626,7 @@ class Experiment:
         """
         # 检查现有的日志文件，找到最大的运行编号
         log_dir = self.work_dir / "terminal_logs"
-        max_run_num = 0
-        
-        if log_dir.exists():
-            for log_file in log_dir.glob("run_*.log"):
-                try:
-                    # 从文件名提取运行编号：run_0001.log -> 1
-                    run_num_str = log_file.stem.split('_')[1]  # run_0001 -> 0001
-                    run_num = int(run_num_str)
-                    max_run_num = max(max_run_num, run_num)
-                except (ValueError, IndexError):
-                    # 忽略无法解析的文件名
-                    continue
+        max_run_num = _max_run_number(log_dir) if log_dir.exists() else 0
         
         # 下一个运行编号
         next_run_num = max_run_num + 1
@@ -642,10 +651,8 @@ class Experiment:
         log_dir = self.work_dir / "terminal_logs"
         if not log_dir.exists():
             return []
-        runs = []
-        for log_file in log_dir.glob("*.log"):
-            run_id = log_file.stem
-            runs.append(run_id)
+        with os.scandir(log_dir) as entries:
+            runs = [entry.name[:-4] for entry in entries if entry.name.endswith(".log")]
         return sorted(runs)
 
     def get_summary(self) -> Dict:
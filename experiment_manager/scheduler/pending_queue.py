@@ -0,0 +1,168 @@
+"""调度器的 pending 优先级队列
+
+基于 heapq 实现：优先级越大越先出队，同优先级内保持先进先出。
+移除条目时只打墓碑标记 (O(1))，被标记的条目在到达堆顶时才真正丢弃；
+墓碑数超过存活条目的一半时整体重建一次堆，避免频繁取消任务时堆无限增长。
+重试任务可以插到同优先级的最前面 (push(task, front=True))，但不会越过更高优先级的任务。
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 堆条目: [-priority, 入队序号, task], 入队序号唯一, 因此比较永远不会落到 task 本身上
+# 插队条目的序号取自递减的负数序列, 因此排在同优先级的普通条目之前, 且后插队的先出队
+# task 为调度器的 PendingTask, 这里只依赖其 config.priority 与 id 属性
+_Entry = List[Any]
+_REMOVED = object()  # 墓碑: 被移除条目的 task 位置会替换为它
+
+
+class PendingQueue:
+    """按优先级出队的 pending 队列"""
+
+    def __init__(self, tasks: Iterable[Any] = ()):
+        self._seq = itertools.count()
+        self._front_seq = itertools.count(-1, -1)
+        self._entry_by_id: Dict[str, _Entry] = {}  # task id -> 堆条目, 用于 O(1) 移除
+        self._heap: List[_Entry] = [self._make_entry(task) for task in tasks]
+        heapq.heapify(self._heap)  # O(n) 建堆, 无需预先排序
+        self._live = len(self._heap)  # 未被移除的条目数
+        self._snapshot: Optional[List[Any]] = None  # 按出队顺序排好的条目快照, 队列变化时清空
+
+    def _make_entry(self, task: Any, front: bool = False) -> _Entry:
+        entry = [-task.config.priority, next(self._front_seq if front else self._seq), task]
+        self._entry_by_id[task.id] = entry
+        return entry
+
+    def _drop_removed_head(self) -> None:
+        heap = self._heap
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+
+    def _compact(self) -> None:
+        """丢弃全部墓碑并重建堆, O(n)"""
+        self._heap = [entry for entry in self._heap if entry[2] is not _REMOVED]
+        heapq.heapify(self._heap)
+
+    def push(self, task: Any, *, front: bool = False) -> None:
+        """入队, front=True 时排到同优先级条目的最前面 (用于重试)"""
+        heapq.heappush(self._heap, self._make_entry(task, front))
+        self._live += 1
+        self._snapshot = None
+
+    def pop(self) -> Any:
+        """弹出优先级最高的条目, 队列为空时抛出 IndexError"""
+        self._drop_removed_head()
+        entry = heapq.heappop(self._heap)
+        task = entry[2]
+        if self._entry_by_id.get(task.id) is entry:
+            del self._entry_by_id[task.id]
+        self._live -= 1
+        self._snapshot = None
+        return task
+
+    def peek(self) -> Any:
+        """查看下一个将被弹出的条目, 队列为空时抛出 IndexError"""
+        self._drop_removed_head()
+        return self._heap[0][2]
+
+    def remove(self, task_id: str) -> bool:
+        """移除指定 id 的条目, 返回是否有条目被移除"""
+        entry = self._entry_by_id.pop(task_id, None)
+        if entry is None:
+            return False
+        entry[2] = _REMOVED
+        self._live -= 1
+        self._snapshot = None
+        if len(self._heap) - self._live > self._live // 2:
+            self._compact()
+        return True
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __bool__(self) -> bool:
+        return self._live > 0
+
+    def __iter__(self) -> Iterator[Any]:
+        """按出队顺序遍历当前条目的快照 (不修改队列); 队列没变时复用上次排好的快照"""
+        if self._snapshot is None:
+            self._snapshot = [entry[2] for entry in sorted(self._heap) if entry[2] is not _REMOVED]
+        return iter(self._snapshot)
+
+
+class TieredPendingQueue:
+    """按优先级分成高/低两组的 pending 队列, 防止低优先级任务被长期饿死
+
+    priority >= boundary 的任务进入高组, 其余进入低组。平时从高组出队,
+    当低组有任务等待且高组已连续出队 starvation_limit 次时, 从低组出队一次。
+    对外接口与 PendingQueue 一致。
+    """
+
+    def __init__(self, tasks: Iterable[Any] = (), *, boundary: int, starvation_limit: int):
+        if starvation_limit <= 0:
+            raise ValueError("starvation_limit 必须为正整数")
+        self.boundary = boundary
+        self.starvation_limit = starvation_limit
+        high: List[Any] = []
+        low: List[Any] = []
+        for task in tasks:
+            (high if task.config.priority >= boundary else low).append(task)
+        self._high = PendingQueue(high)
+        self._low = PendingQueue(low)
+        self._high_streak = 0  # 低组有任务等待时, 高组已连续出队的次数
+
+    def _next_group(self) -> PendingQueue:
+        if self._low and (not self._high or self._high_streak >= self.starvation_limit):
+            return self._low
+        return self._high
+
+    def push(self, task: Any, *, front: bool = False) -> None:
+        (self._high if task.config.priority >= self.boundary else self._low).push(task, front=front)
+
+    def pop(self) -> Any:
+        """弹出下一个条目, 队列为空时抛出 IndexError"""
+        group = self._next_group()
+        task = group.pop()
+        if group is self._low:
+            self._high_streak = 0
+        elif self._low:
+            self._high_streak += 1
+        return task
+
+    def peek(self) -> Any:
+        """查看下一个将被弹出的条目, 队列为空时抛出 IndexError"""
+        return self._next_group().peek()
+
+    def remove(self, task_id: str) -> bool:
+        return self._high.remove(task_id) or self._low.remove(task_id)
+
+    def __len__(self) -> int:
+        return len(self._high) + len(self._low)
+
+    def __bool__(self) -> bool:
+        return bool(self._high) or bool(self._low)
+
+    def __iter__(self) -> Iterator[Any]:
+        """按出队顺序遍历当前条目的快照 (不修改队列)
+
+        在两组快照上按 pop() 的规则模拟出队 (含防饿死的连续计数), 与实际调度顺序一致。
+        """
+        high, low = iter(self._high), iter(self._low)
+        high_left, low_left = len(self._high), len(self._low)
+        streak = self._high_streak
+        limit = self.starvation_limit
+        while high_left or low_left:
+            if low_left and (not high_left or streak >= limit):
+                yield next(low)
+                low_left -= 1
+                streak = 0
+            else:
+                yield next(high)
+                high_left -= 1
+                if low_left:
+                    streak += 1
+
+
+__all__ = ["PendingQueue", "TieredPendingQueue"]
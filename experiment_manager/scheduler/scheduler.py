@@ -4,15 +4,24 @@
 """
 from __future__ import annotations
 
+import dataclasses
+import heapq
+import itertools
+from contextlib import contextmanager
 import os
+import select
 import signal
+import statistics
 import subprocess
+import threading
 import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
 
 from experiment_manager.core import Experiment, ExperimentStatus
 from experiment_manager.integrations.lark.sync_utils import (
@@ -20,33 +29,74 @@ from experiment_manager.integrations.lark.sync_utils import (
     expand_lark_config,
 )
 from experiment_manager.utils.config import ConfigManager
+from experiment_manager.scheduler.pending_queue import PendingQueue, TieredPendingQueue
 from experiment_manager.scheduler.state_store import SchedulerStateStore, LOCAL_TZ
 
 
-@dataclass(order=True)
+OUTPUT_DRAIN_TIMEOUT = 1.0  # 子进程退出后等待输出线程写入最终状态的最长时间 (秒), 期间不阻塞主循环
+MIN_CHECK_INTERVAL = 0.05   # 有状态变化后下一轮的等待间隔 (秒), 之后逐轮放大直到 check_interval
+CHECK_INTERVAL_BACKOFF = 1.5    # 空转时等待间隔的放大倍数
+_JSON_SCALAR_TYPES = frozenset((str, int, float, bool))    # 可以原样写入状态文件的标量类型
+_UID_COUNTER = itertools.count(1)  # 为每个 ScheduledExperiment 分配进程内唯一的整数 uid
+
+
+@dataclass(frozen=True, eq=False)
 class ScheduledExperiment:
-    """内部调度用的实验定义"""
+    """内部调度用的实验定义 (不可变, repeats 展开出的副本共享同一批容器)
 
-    # dataclass order 使用 sort_index 来实现按优先级排序（优先级越大越靠前）
-    sort_index: int = field(init=False, repr=False)
+    eq=False: 按对象身份比较和哈希, 每个 repeats 副本都是独立的调度条目。
+    """
 
     name: str
     command: str
     priority: int = 0
-    tags: List[str] = field(default_factory=list)
-    gpu_ids: List[int] = field(default_factory=list)
+    tags: Tuple[str, ...] = ()
+    gpu_ids: Tuple[int, ...] = ()
     cwd: Optional[str] = None
     base_dir: Optional[str] = None
-    environment: Dict[str, Any] = field(default_factory=dict)
+    environment: Mapping[str, Any] = field(default_factory=dict)
     resume: Optional[str] = None
     description: Optional[str] = None
     repeats: int = 1
     max_retries: int = 0
     delay_seconds: float = 0.0
     lark_config_raw: Optional[dict] = None  # 原始 lark 配置（来自配置文件中的 lark_config / lark_url 合并）
+    # 加载配置时解析好的绝对路径, 启动 (含重试) 时直接使用, 避免重复 resolve
+    resolved_base_dir: Optional[Path] = field(default=None, repr=False, compare=False)
+    resolved_cwd: Optional[Path] = field(default=None, repr=False, compare=False)
+    # 与 scheduler 级配置合并并展开 URL 后的 lark 配置, 同样在加载时算好
+    resolved_lark_config: Optional[dict] = field(default=None, repr=False, compare=False)
+    uid: int = field(init=False, repr=False, compare=False)  # 唯一编号, 用于统计时按配置分组
+    env_strings: Dict[str, str] = field(init=False, repr=False, compare=False)  # 注入子进程的环境变量 (值已转为 str)
+    retry_budget: int = field(init=False, repr=False, compare=False)  # 允许的最大 attempt 数 (含首次运行)
 
     def __post_init__(self) -> None:
-        self.sort_index = -self.priority
+        # frozen dataclass 只能通过 object.__setattr__ 初始化派生字段;
+        # 对已是 tuple / mappingproxy 的值不会重复拷贝, 因此 dataclasses.replace 出的副本共享容器
+        setattr_ = object.__setattr__
+        setattr_(self, "tags", tuple(self.tags))
+        setattr_(self, "gpu_ids", tuple(self.gpu_ids))
+        if not isinstance(self.environment, MappingProxyType):
+            setattr_(self, "environment", MappingProxyType(dict(self.environment)))
+        setattr_(self, "uid", next(_UID_COUNTER))
+        setattr_(self, "env_strings", {key: str(value) for key, value in self.environment.items()})
+        setattr_(self, "retry_budget", self.max_retries + 1 if self.max_retries > 0 else 1)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # mappingproxy 无法 pickle / deepcopy, 序列化时换成普通 dict; payload 缓存丢弃后按需重建
+        state = dict(self.__dict__)
+        state["environment"] = dict(self.environment)
+        state.pop("payload", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state["environment"] = MappingProxyType(state["environment"])
+        self.__dict__.update(state)
+
+    @cached_property
+    def payload(self) -> Dict[str, Any]:
+        """to_payload() 的缓存版本; 配置加载后不再修改, 只需序列化一次 (调用方不得修改返回值)"""
+        return self.to_payload()
 
     def to_payload(self) -> Dict[str, Any]:
         return {
@@ -67,13 +117,67 @@ class ScheduledExperiment:
         }
 
 
+class PendingTask(NamedTuple):
+    """pending 队列中的条目"""
+
+    config: ScheduledExperiment
+    order: int
+    attempt: int    # 已经运行过的次数
+    id: str
+    created_at: Optional[str] = None    # ISO 时间字符串, 创建时格式化一次
+
+
+class LaunchedRuntime(NamedTuple):
+    """_launch_experiment 的返回值"""
+
+    instance: Experiment
+    process: Optional[subprocess.Popen]    # dry_run 时为 None
+    work_dir: Optional[str] = None
+    run_id: Optional[str] = None
+
+
+class ActiveSlot(NamedTuple):
+    """正在运行的条目"""
+
+    config: ScheduledExperiment
+    instance: Experiment
+    process: Optional[subprocess.Popen]
+    attempt: int
+    started_ns: Optional[int] = None    # 启动时刻 (time.monotonic_ns)
+    started_at: Optional[str] = None    # 启动时刻的 ISO 时间字符串, 启动时格式化一次
+    id: Optional[str] = None
+    created_at: Optional[str] = None
+    order: int = 0
+    work_dir: Optional[str] = None
+    run_id: Optional[str] = None
+    exited_ns: Optional[int] = None    # 首次发现子进程已退出的时刻 (time.monotonic_ns), 用于限制等待输出线程的时间
+
+
+class FinishedRecord(NamedTuple):
+    """已结束 (成功 / 失败 / 被终止) 的一次运行记录"""
+
+    config: ScheduledExperiment
+    status: str     # success / failed / terminated
+    attempt: int
+    return_code: Optional[int] = None
+    id: Optional[str] = None
+    created_at: Optional[str] = None
+    started_ns: Optional[int] = None    # 启动时刻 (time.monotonic_ns)
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    order: int = 0
+    work_dir: Optional[str] = None
+    run_id: Optional[str] = None
+
+
 class ExperimentScheduler:
     """实验调度器：按配置顺序执行多组实验"""
 
-    def __init__(self, config_path: Path, dry_run: bool = False):
+    def __init__(self, config_path: Path, dry_run: bool = False) -> None:
         self.config_path = Path(config_path)
         self.config_dir = self.config_path.parent.resolve() # 配置文件所在目录
         self.invocation_cwd = Path.cwd().resolve()  # 调度器启动时的工作目录
+        self._path_cache: Dict[str, Path] = {}  # 配置中的原始路径字符串 -> 解析后的绝对路径
         self.config_manager = ConfigManager(self.config_path)   # 配置对象
         scheduler_cfg = self.config_manager.get_scheduler_config()  # 调度器配置
         self.max_concurrent = int(scheduler_cfg.get("max_concurrent_experiments", 1))   # 最大并发实验数
@@ -81,13 +185,11 @@ class ExperimentScheduler:
         base_dir_value = scheduler_cfg.get("base_experiment_dir")
         if not base_dir_value or not str(base_dir_value).strip():
             raise ValueError("配置项 scheduler.base_experiment_dir 为必填，请在配置文件中显式指定")
-        base_dir_path = Path(base_dir_value).expanduser()
-        if base_dir_path.is_absolute():
-            self.base_experiment_dir = base_dir_path.resolve()
-        else:
-            self.base_experiment_dir = (self.invocation_cwd / base_dir_path).resolve()   # 实验输出根目录
+        self.base_experiment_dir = self._resolve_user_path(base_dir_value)   # 实验输出根目录
         self.auto_restart = bool(scheduler_cfg.get("auto_restart_on_error", False)) # 是否自动重启错误的实验
+        self._retries_enabled = self.auto_restart
         self.linger_when_idle = bool(scheduler_cfg.get("linger_when_idle", True))   # 实验全部完成后是否继续等待 UI 操作命令
+        self.starvation_limit = int(scheduler_cfg.get("starvation_limit", 0))   # 高优先级组连续启动多少个后让低优先级组启动一个, 0 表示严格按优先级
 
         # 解析 scheduler 级别 lark 配置
         scheduler_lark_url = scheduler_cfg.get("lark_url")
@@ -108,10 +210,23 @@ class ExperimentScheduler:
         self._waiting_for_shutdown = False  # 是否正在等待关闭指令 (当全部结束空闲挂起状态时且 linger_when_idle=True 时变为 True)
 
         self._scheduled = self._load_experiments_from_config()   # 加载所有组实验的配置
-        self._pending = []    # pending 列表
-        self._active = []     # running 列表
-        self._finished = []   # finished 列表
-
+        self._pending = PendingQueue()    # pending 优先级队列 (元素为 PendingTask)
+        self._active: List[ActiveSlot] = []     # running 列表
+        # 配置了 delay_seconds 的任务在延迟期间占用一个槽位, 按到期时间 (time.monotonic) 存放在最小堆中
+        self._delayed: List[Tuple[float, int, PendingTask]] = []
+        self._delay_seq = itertools.count()    # 到期时间相同时按进入顺序出堆
+        self._finished: Dict[str, FinishedRecord] = {}   # finished 记录, 按 id 索引 (保持插入顺序)
+        self._finished_by_uid: Dict[int, Dict[str, FinishedRecord]] = {}  # 同一配置 (uid) 的 finished 记录, 供总结统计
+
+        self._wakeup_fds: Optional[Tuple[int, int]] = None  # SIGCHLD 唤醒管道 (read_fd, write_fd), 仅在 run_all 期间存在
+        self._child_exit_pending = False    # 自上次收割以来是否收到过 SIGCHLD
+        self._last_full_scan = 0.0          # 上次逐个 poll 子进程的时间 (time.monotonic)
+        self._dirty = True  # 队列/状态自上次写入状态文件后是否有变化
+        self._sync_batch_depth = 0  # 大于 0 时 _sync_state 推迟到批次结束统一写入
+        self._current_interval = self.check_interval  # 自适应等待间隔, 有进展时重置为最小值, 空转时逐渐放大
+
+        # 单调时钟到墙上时钟的偏移, 只在需要展示时把 monotonic_ns 换算成时间戳
+        self._wall_clock_offset_ns = time.time_ns() - time.monotonic_ns()
         self._task_counter = 0  # 内部递增的流水号, 保证即使有重试事件也能唯一标识条目
         self.state_store = SchedulerStateStore(self.base_experiment_dir)    # 拿到状态持久化管理器 (会把调度器的操作/状态读写到本地磁盘)
 
@@ -121,39 +236,31 @@ class ExperimentScheduler:
     def _load_experiments_from_config(self) -> List[ScheduledExperiment]:
         experiments_cfg = self.config_manager.get_experiments()
         scheduled: List[ScheduledExperiment] = []
+        errors: List[str] = []
+        first_error: Optional[Exception] = None
 
-        # cfg 是 toml 里每一个 experiment 的配置
+        # cfg 是 toml 里每一个 experiment 的配置; 先完整校验一遍, 再统一报告所有错误
         for index, cfg in enumerate(experiments_cfg):
             try:
                 scheduled.append(self._create_experiment_config(cfg))
-            except Exception as exc:  # pragma: no cover - 配置错误时的防御
-                raise ValueError(f"加载第 {index + 1} 个实验配置失败: {exc}")
-
-        # 按优先级排序（大优先级在前）
-        scheduled.sort()
+            except Exception as exc:
+                errors.append(f"加载第 {index + 1} 个实验配置失败: {exc}")
+                if first_error is None:
+                    first_error = exc
+        if errors:
+            raise ValueError("\n".join(errors)) from first_error
 
         # 根据 repeats 扩展队列
         expanded: List[ScheduledExperiment] = []
         for exp_cfg in scheduled:
+            if exp_cfg.repeats == 1:
+                # 绝大多数实验不重复, 直接复用已构造好的实例
+                expanded.append(exp_cfg)
+                continue
             repeat_count = max(1, int(exp_cfg.repeats))
-            for _ in range(repeat_count):
-                clone = ScheduledExperiment(
-                    name=exp_cfg.name,
-                    command=exp_cfg.command,
-                    priority=exp_cfg.priority,
-                    tags=list(exp_cfg.tags),
-                    gpu_ids=list(exp_cfg.gpu_ids),
-                    cwd=exp_cfg.cwd,
-                    base_dir=exp_cfg.base_dir,
-                    environment=dict(exp_cfg.environment),
-                    resume=exp_cfg.resume,
-                    description=exp_cfg.description,
-                    repeats=1,
-                    max_retries=exp_cfg.max_retries,
-                    delay_seconds=exp_cfg.delay_seconds,
-                    lark_config_raw=exp_cfg.lark_config_raw,
-                )
-                expanded.append(clone)
+            # 配置对象不可变, 各副本共享同一批 tuple / mappingproxy 容器;
+            # replace 会重新执行 __post_init__, 因此每个副本拥有独立的 uid
+            expanded.extend(dataclasses.replace(exp_cfg, repeats=1) for _ in range(repeat_count))
 
         return expanded
 
@@ -164,65 +271,98 @@ class ExperimentScheduler:
         except KeyError as missing:
             raise ValueError(f"实验配置缺少必需字段: {missing}") from None
 
-        priority = int(cfg.get("priority", 0))
-        tags = cfg.get("tags", []) or []
+        get = cfg.get   # 局部绑定, 避免每个字段都查找一次方法
+        priority = int(get("priority", 0))
+        tags = get("tags") or []
         if not isinstance(tags, list):
             raise ValueError("tags 必须是列表")
 
-        gpu_ids_raw = cfg.get("gpu_ids")
-        gpu_ids: List[int] = []
+        gpu_ids_raw = get("gpu_ids")
         if gpu_ids_raw is None:
-            gpu_ids = []
-        elif isinstance(gpu_ids_raw, (list, tuple)):
-            try:
-                gpu_ids = [int(item) for item in gpu_ids_raw]
-            except (TypeError, ValueError) as exc:
-                raise ValueError("gpu_ids 必须是整数列表") from exc
+            gpu_ids: Tuple[int, ...] = ()
         elif isinstance(gpu_ids_raw, str):
             try:
-                gpu_ids = [int(part.strip()) for part in gpu_ids_raw.split(",") if part.strip()]
+                gpu_ids = tuple(map(int, filter(None, map(str.strip, gpu_ids_raw.split(",")))))
             except ValueError as exc:
                 raise ValueError("gpu_ids 字符串需由逗号分隔的整数构成") from exc
+        elif isinstance(gpu_ids_raw, (list, tuple)):
+            try:
+                gpu_ids = tuple(map(int, gpu_ids_raw))
+            except (TypeError, ValueError) as exc:
+                raise ValueError("gpu_ids 必须是整数列表") from exc
         else:
             raise ValueError("gpu_ids 必须是列表、元组或字符串")
 
-        base_dir = cfg.get("base_dir")
-        cwd_value = cfg.get("cwd")
-        env_cfg = cfg.get("environment", {}) or {}
+        base_dir = get("base_dir")
+        cwd_value = get("cwd")
+        env_cfg = get("environment") or {}
         if not isinstance(env_cfg, dict):
             raise ValueError("environment 必须是字典")
 
-        resume = cfg.get("resume")
-        description = cfg.get("description")
-        repeats = int(cfg.get("repeats", 1))
-        max_retries = int(cfg.get("max_retries", 0))
-        delay_seconds = float(cfg.get("delay_seconds", 0))
+        resume = get("resume")
+        description = get("description")
+        repeats = int(get("repeats", 1))
+        max_retries = int(get("max_retries", 0))
+        delay_seconds = float(get("delay_seconds", 0))
 
         # 解析实验级 lark 配置
-        exp_lark_url = cfg.get("lark_url")
-        exp_lark_dict = cfg.get("lark_config") or {}
+        exp_lark_url = get("lark_url")
+        exp_lark_dict = get("lark_config") or {}
         if exp_lark_url and isinstance(exp_lark_dict, dict):
             exp_lark_dict = {**exp_lark_dict, "url": exp_lark_url}
         elif exp_lark_url and not exp_lark_dict:
             exp_lark_dict = {"url": exp_lark_url}
+        lark_config_raw = exp_lark_dict if isinstance(exp_lark_dict, dict) and exp_lark_dict else None
 
         return ScheduledExperiment(
             name=name,
             command=command,
             priority=priority,
-            tags=tags,
+            tags=tuple(tags),
             gpu_ids=gpu_ids,
             cwd=cwd_value,
             base_dir=base_dir,
-            environment=env_cfg,
+            environment=env_cfg,  # __post_init__ 会拷贝一份再包成只读视图
             resume=resume,
             description=description,
             repeats=repeats,
             max_retries=max_retries,
             delay_seconds=delay_seconds,
-            lark_config_raw=exp_lark_dict if isinstance(exp_lark_dict, dict) and exp_lark_dict else None,
+            lark_config_raw=lark_config_raw,
+            resolved_base_dir=self._resolve_user_path(base_dir) if base_dir else None,
+            resolved_cwd=self._resolve_user_path(cwd_value) if cwd_value else None,
+            resolved_lark_config=self._resolve_lark_config(lark_config_raw),
         )
 
+    def _resolve_lark_config(self, exp_lark: Optional[dict]) -> Optional[dict]:
+        """合并 lark 配置 (scheduler 级别 < 实验级别, 后者优先覆盖) 并展开 URL"""
+        merged_lark: Optional[dict] = None
+        if self._scheduler_lark_config_raw:
+            merged_lark = dict(self._scheduler_lark_config_raw)
+        if exp_lark:
+            if merged_lark:
+                merged_lark.update(exp_lark)
+            else:
+                merged_lark = dict(exp_lark)
+        if not merged_lark:
+            return None
+        coerced = coerce_lark_config_input(merged_lark)
+        return expand_lark_config(coerced) or coerced
+
+    def _resolve_user_path(self, value: Any) -> Path:
+        """把配置中的路径解析为绝对路径, 相对路径以调度器启动目录为基准
+
+        多个实验通常共用同一个 base_dir / cwd, 同一原始字符串只解析一次 (resolve 需要走文件系统)
+        """
+        key = str(value)
+        resolved = self._path_cache.get(key)
+        if resolved is None:
+            path = Path(value).expanduser()
+            if not path.is_absolute():
+                path = self.invocation_cwd / path
+            resolved = self._path_cache[key] = path.resolve()
+        return resolved
+
     # ------------------------------------------------------------------
     # 调度生命周期
     # ------------------------------------------------------------------
@@ -237,48 +377,54 @@ class ExperimentScheduler:
         print(f"🔧 实验调度器启动，共 {len(self._pending)} 个任务，最大并发 {self.max_concurrent}。")
 
         summary_printed = False
-
-        # 只要没收到 "停止调度器" 指令就一直循环
-        while not self._shutdown_requested:
-            self._consume_commands()    # 执行一条指令
-            self._try_launch_new_tasks()    # 尝试启动新的实验
-
-            if self._active:
-                if self._waiting_for_shutdown:
-                    self._waiting_for_shutdown = False
-                    self._status_indicator = "running"
-                    self._sync_state()
-                time.sleep(self.check_interval)
-                self._harvest_finished_tasks()  # 收割一波
-                summary_printed = False
-                continue
-
-            if self._pending:
-                if self._waiting_for_shutdown:
-                    self._waiting_for_shutdown = False
-                    self._status_indicator = "running"
+        previous_signal_state = self._install_sigchld_handler()
+        try:
+            # 只要没收到 "停止调度器" 指令就一直循环
+            while not self._shutdown_requested:
+                with self._batched_sync():  # 本轮的所有状态变化合并为一次写入
+                    progress = self._consume_commands()    # 执行一条指令
+                    # 先收割再启动: 子进程退出唤醒主循环后, 空出的槽位在同一轮里就会被补上
+                    progress += self._harvest_finished_tasks()
+                    progress += self._try_launch_new_tasks()    # 尝试启动新的实验
+                self._adjust_interval(progress)
+
+                if self._active or self._pending or self._delayed:
+                    if self._waiting_for_shutdown:
+                        self._waiting_for_shutdown = False
+                        self._status_indicator = "running"
+                        self._dirty = True
+                        self._sync_state()
+                    # 每轮只等待一次; 有延迟任务时不会睡过它的到期时间
+                    timeout = self._current_interval
+                    if self._child_exit_pending:
+                        # 还有已退出但未收割完的子进程 (例如输出线程尚在收尾), 尽快再检查
+                        timeout = min(timeout, MIN_CHECK_INTERVAL)
+                    if self._delayed:
+                        timeout = min(timeout, max(self._delayed[0][0] - time.monotonic(), 0.0))
+                    self._wait_for_child_exit(timeout)
+                    summary_printed = False
+                    continue
+
+                if not summary_printed:
+                    # 如果进到这就说明 _active 和 _pending 都空了, 打印总结
+                    self._print_summary()
+                    summary_printed = True
+
+                # 进到这说明既空闲, 且用户自己设置了空闲时就退出, 那么就退出
+                if not self.linger_when_idle:
+                    break
+
+                # 进到这说明空闲, 但用户设置了空闲时继续等待指令, 那么就把 _waiting_for_shutdown 置为 True
+                if not self._waiting_for_shutdown:
+                    self._waiting_for_shutdown = True
+                    self._status_indicator = "awaiting_shutdown"
+                    self._dirty = True
                     self._sync_state()
-                time.sleep(self.check_interval)
-                summary_printed = False
-                continue
-
-            if not summary_printed:
-                # 如果进到这就说明 _active 和 _pending 都空了, 打印总结
-                self._print_summary()
-                summary_printed = True
-
-            # 进到这说明既空闲, 且用户自己设置了空闲时就退出, 那么就退出
-            if not self.linger_when_idle:
-                break
 
-            # 进到这说明空闲, 但用户设置了空闲时继续等待指令, 那么就把 _waiting_for_shutdown 置为 True
-            if not self._waiting_for_shutdown:
-                self._waiting_for_shutdown = True
-                self._status_indicator = "awaiting_shutdown"
-                self._sync_state()
-
-            sleep_interval = min(self.check_interval or 0.5, 0.5)
-            time.sleep(sleep_interval)
+                # 空闲时同样经由 SIGCHLD 唤醒管道等待, 与运行时共用同一个等待入口
+                self._wait_for_child_exit(min(self._current_interval or 0.5, 0.5))
+        finally:
+            self._restore_sigchld_handler(previous_signal_state)
 
         if not summary_printed:
             self._print_summary()
@@ -286,216 +432,349 @@ class ExperimentScheduler:
         self._status_indicator = "stopped"
         self._waiting_for_shutdown = False
         self._shutdown_requested = False
+        self._dirty = True
         self._sync_state()
 
     # ------------------------------------------------------------------
     # 队列与执行
     # ------------------------------------------------------------------
     def _prepare_pending_queue(self) -> None:
-        self._pending = []
-        for order, exp_cfg in enumerate(self._scheduled):
-            self._pending.append(
-                {
-                    "config": exp_cfg,
-                    "order": order,
-                    "attempt": 0,
-                    "id": self._new_task_id(),  # 唯一标识 id
-                    "created_at": datetime.now(tz=LOCAL_TZ),
-                }
+        # 优先级顺序由 PendingQueue 维护 (大优先级在前, 同优先级按配置顺序)
+        created_at = self._now_iso()
+        tasks = [
+            PendingTask(
+                config=exp_cfg,
+                order=order,
+                attempt=0,
+                id=self._new_task_id(),  # 唯一标识 id
+                created_at=created_at,
+            )
+            for order, exp_cfg in enumerate(self._scheduled)
+        ]
+        priorities = sorted({exp_cfg.priority for exp_cfg in self._scheduled})
+        if self.starvation_limit > 0 and len(priorities) > 1:
+            # 以不同优先级取值的中位数为界分成高/低两组, 避免低优先级任务被饿死
+            self._pending = TieredPendingQueue(
+                tasks,
+                boundary=statistics.median_high(priorities),
+                starvation_limit=self.starvation_limit,
             )
+        else:
+            self._pending = PendingQueue(tasks)
+        self._dirty = True
         self._sync_state()
 
+    def _adjust_interval(self, progress: int) -> None:
+        """本轮有任何状态变化则把等待间隔重置为最小值, 否则按倍数放大, 上限为 check_interval"""
+        if progress:
+            self._current_interval = min(MIN_CHECK_INTERVAL, self.check_interval)
+        else:
+            self._current_interval = min(self._current_interval * CHECK_INTERVAL_BACKOFF, self.check_interval)
+
+    def _install_sigchld_handler(self) -> Optional[Tuple[Any, int]]:
+        """注册 SIGCHLD 处理器, 子进程退出时通过 self-pipe 立即唤醒主循环
+
+        信号可能被投递到任意线程 (例如实验的输出线程), 因此借助 signal.set_wakeup_fd
+        由解释器在 C 层直接写管道, 保证阻塞在 select 上的主线程一定会被唤醒。
+        仅在 POSIX 主线程中生效, 其余情况返回 None 并退化为定时轮询。
+        """
+        if os.name == "nt" or threading.current_thread() is not threading.main_thread():
+            return None
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        self._wakeup_fds = (read_fd, write_fd)
+        previous_wakeup_fd = signal.set_wakeup_fd(write_fd, warn_on_full_buffer=False)
+        previous_handler = signal.signal(signal.SIGCHLD, self._on_sigchld)
+        return previous_handler, previous_wakeup_fd
+
+    def _restore_sigchld_handler(self, previous: Optional[Tuple[Any, int]]) -> None:
+        if self._wakeup_fds is None or previous is None:
+            return
+        previous_handler, previous_wakeup_fd = previous
+        signal.signal(signal.SIGCHLD, previous_handler if previous_handler is not None else signal.SIG_DFL)
+        signal.set_wakeup_fd(previous_wakeup_fd)
+        for fd in self._wakeup_fds:
+            os.close(fd)
+        self._wakeup_fds = None
+
+    @staticmethod
+    def _on_sigchld(signum: int, frame: Any) -> None:
+        # 唤醒由 set_wakeup_fd 完成, 这里只需让 SIGCHLD 不再被默认忽略
+        pass
+
+    def _wait_for_child_exit(self, timeout: float) -> None:
+        """最多等待 timeout 秒, 期间若有子进程退出则立即返回"""
+        if self._wakeup_fds is None:
+            time.sleep(timeout)
+            return
+        read_fd = self._wakeup_fds[0]
+        try:
+            select.select([read_fd], [], [], max(timeout, 0))
+        except InterruptedError:  # pragma: no cover - PEP 475 下通常会自动重试
+            pass
+        try:
+            while os.read(read_fd, 4096):
+                self._child_exit_pending = True
+        except BlockingIOError:
+            pass
+
     def _print_plan_only(self) -> None:
         print("📝 调度计划 (dry-run mode)")
         for idx, item in enumerate(self._pending, start=1):
-            cfg = item["config"]
+            cfg = item.config
             print(
                 f"[{idx:02d}] name={cfg.name}, priority={cfg.priority}, "
                 f"command={cfg.command}, resume={cfg.resume or '-'}"
             )
 
-    def _try_launch_new_tasks(self) -> None:
+    def _try_launch_new_tasks(self) -> int:
+        """启动空闲槽位可容纳的任务, 返回本轮启动的数量"""
         launched = 0
-        while self._pending and len(self._active) < self.max_concurrent:
-            # 取出 _pending 队首
-            task = self._pending.pop(0)
-            cfg = task["config"]
-            task["attempt"] += 1
+        now = time.monotonic()
+        delayed = self._delayed
+        while True:
+            if delayed and delayed[0][0] <= now:
+                # 延迟已到期的任务优先启动, 它的槽位在延迟期间一直保留着
+                task = heapq.heappop(delayed)[2]
+            elif self._pending and len(self._active) + len(delayed) < self.max_concurrent:
+                # 取出优先级最高的任务
+                task = self._pending.pop()
+                if task.config.delay_seconds > 0:
+                    # 不阻塞调度循环: 记录到期时间, 到期后再启动
+                    heapq.heappush(delayed, (now + task.config.delay_seconds, next(self._delay_seq), task))
+                    self._dirty = True
+                    continue
+            else:
+                break
+            cfg = task.config
+            attempt = task.attempt + 1
             # 打包为一个 experiment 实例
-            experiment = self._launch_experiment(cfg, attempt=task["attempt"])
+            runtime = self._launch_experiment(cfg, attempt=attempt)
+            started_ns = time.monotonic_ns()
 
             self._active.append(
-                {
-                    "config": cfg,
-                    "experiment": experiment,
-                    "started_at": datetime.now(tz=LOCAL_TZ),
-                    "attempt": task["attempt"],
-                    "id": task["id"],
-                    "created_at": task.get("created_at"),
-                    "work_dir": str(experiment["instance"].work_dir) if isinstance(experiment, dict) else None,
-                    "run_id": experiment["instance"].current_run_id if isinstance(experiment, dict) else None,
-                }
+                ActiveSlot(
+                    config=cfg,
+                    instance=runtime.instance,
+                    process=runtime.process,
+                    attempt=attempt,
+                    started_ns=started_ns,
+                    started_at=self._format_monotonic_ns(started_ns),
+                    id=task.id,
+                    created_at=task.created_at,
+                    order=task.order,
+                    work_dir=runtime.work_dir,
+                    run_id=runtime.run_id,
+                )
             )
             launched += 1
 
         if launched:
             print(f"🚀 本轮启动 {launched} 个实验，当前运行 {len(self._active)} 个。")
-            self._sync_state()
-
-    def _launch_experiment(self, cfg: ScheduledExperiment, attempt: int):
-        config_dir = self.config_dir
-
-        if cfg.base_dir:
-            custom_base = Path(cfg.base_dir).expanduser()
-            if custom_base.is_absolute():
-                base_dir = custom_base.resolve()
-            else:
-                base_dir = (self.invocation_cwd / custom_base).resolve()
-        else:
-            base_dir = self.base_experiment_dir
-
-        if cfg.cwd:
-            custom_cwd = Path(cfg.cwd).expanduser()
-            if custom_cwd.is_absolute():
-                working_dir = custom_cwd.resolve()
-            else:
-                working_dir = (self.invocation_cwd / custom_cwd).resolve()
-        else:
-            working_dir = config_dir
+            self._dirty = True
+        self._sync_state()
+        return launched
 
-        # 合并 lark 配置：scheduler 级别 < 实验级别 （后者优先覆盖）
-        merged_lark: Optional[dict] = None
-        if self._scheduler_lark_config_raw:
-            merged_lark = dict(self._scheduler_lark_config_raw)
-        if cfg.lark_config_raw:
-            if merged_lark:
-                merged_lark.update(cfg.lark_config_raw)
-            else:
-                merged_lark = dict(cfg.lark_config_raw)
-        # 规范化并展开 URL（如果有）
-        expanded_lark = None
-        if merged_lark:
-            coerced = coerce_lark_config_input(merged_lark)
-            expanded_lark = expand_lark_config(coerced) or coerced
+    def _launch_experiment(self, cfg: ScheduledExperiment, attempt: int) -> LaunchedRuntime:
+        base_dir = cfg.resolved_base_dir or self.base_experiment_dir
+        working_dir = cfg.resolved_cwd or self.config_dir
 
         exp = Experiment(
             base_dir=base_dir,
             name=cfg.name,
             command=cfg.command,
-            gpu_ids=list(cfg.gpu_ids),
+            gpu_ids=cfg.gpu_ids,   # Experiment 构造时自行转换为 list
             cwd=working_dir,
             tags=cfg.tags,
             resume=cfg.resume,
             description=cfg.description,
-            lark_config=expanded_lark,
+            lark_config=cfg.resolved_lark_config,   # Experiment 会复制一份, 可直接共享
         )
 
         if cfg.delay_seconds > 0:
-            exp.append_log(f"任务配置了启动延迟 {cfg.delay_seconds}s (attempt={attempt})")
-            time.sleep(cfg.delay_seconds)
-
-        env_updates = self._prepare_environment(cfg)
+            exp.append_log(f"任务配置了启动延迟 {cfg.delay_seconds}s, 延迟已结束 (attempt={attempt})")
 
         if self.dry_run:
-            return exp
+            return LaunchedRuntime(exp, None, str(exp.work_dir), exp.current_run_id)
 
-        process = exp.run(background=True, extra_env=env_updates)
+        process = exp.run(background=True, extra_env=cfg.env_strings)
         exp.append_log(f"调度 attempt={attempt}")
 
-        return {
-            "instance": exp,
-            "process": process,
-        }
-
-    def _prepare_environment(self, cfg: ScheduledExperiment) -> Dict[str, str]:
-        env = {}
-        for key, value in cfg.environment.items():
-            env[key] = str(value)
-        return env
-
-    def _harvest_finished_tasks(self) -> None:
-        still_running: List[Dict[str, Any]] = []
+        return LaunchedRuntime(exp, process, str(exp.work_dir), exp.current_run_id)
+
+    def _harvest_finished_tasks(self) -> int:
+        """收割已退出的任务, 返回本轮收割的数量"""
+        now = time.monotonic()
+        if self._wakeup_fds is not None:
+            # 子进程退出必然伴随 SIGCHLD; 没收到信号就不必逐个 poll。
+            # 但每隔 check_interval 仍兜底全量检查一次, 以防信号处理器被其他代码替换
+            if not self._child_exit_pending and now - self._last_full_scan < self.check_interval:
+                return 0
+            self._child_exit_pending = False
+        self._last_full_scan = now
+
+        # 循环内用到的属性/方法先绑定为局部变量, 省去每个槽位的属性查找
+        still_running: List[ActiveSlot] = []
+        keep_running = still_running.append
+        add_finished = self._add_finished
+        pending_push = self._pending.push
+        poll_returncode = self._poll_returncode
+        gated = self._wakeup_fds is not None
+        retries_enabled = self._retries_enabled
+        now_ns = time.monotonic_ns()
+        drain_timeout_ns = int(OUTPUT_DRAIN_TIMEOUT * 1_000_000_000)
+        rescan = False
         for slot in self._active:
-            cfg = slot["config"]
-            runtime = slot["experiment"]
-            process = runtime["process"]
-            if process.poll() is None:  # 该实验仍在运行中
-                still_running.append(slot)
+            cfg = slot.config
+            return_code = poll_returncode(slot.process)
+            if return_code is None:  # 该实验仍在运行中
+                # 其他线程正在回收该子进程时 poll() 也会返回 None; 没能确认仍在运行就下一轮再查
+                if gated and not rescan and not self._confirmed_running(slot.process):
+                    rescan = True
+                keep_running(slot)
                 continue
 
-            return_code = process.returncode
-            experiment_instance = runtime["instance"]
+            experiment_instance = slot.instance
+            # 进程刚退出时输出线程可能还没来得及写入最终状态; 不在这里等待, 留到下一轮再看,
+            # 超过 OUTPUT_DRAIN_TIMEOUT 仍未结束 (例如孙进程仍占着输出管道) 就不再等它
+            if not experiment_instance.output_drained():
+                if slot.exited_ns is None:
+                    keep_running(slot._replace(exited_ns=now_ns))
+                    rescan = True
+                    continue
+                if now_ns - slot.exited_ns < drain_timeout_ns:
+                    keep_running(slot)
+                    rescan = True
+                    continue
             success = return_code == 0 and experiment_instance.status == ExperimentStatus.FINISHED
 
-            self._finished.append(
-                {
-                    "config": cfg,
-                    "status": "success" if success else "failed",
-                    "attempt": slot["attempt"],
-                    "return_code": return_code,
-                    "id": slot.get("id", self._new_task_id()),
-                    "created_at": slot.get("created_at"),
-                    "started_at": slot.get("started_at"),
-                    "completed_at": datetime.now(tz=LOCAL_TZ),
-                    "work_dir": str(runtime["instance"].work_dir),
-                    "run_id": runtime["instance"].current_run_id,
-                }
+            record = FinishedRecord(
+                config=cfg,
+                status="success" if success else "failed",
+                attempt=slot.attempt,
+                return_code=return_code,
+                id=slot.id or self._new_task_id(),
+                created_at=slot.created_at,
+                started_ns=slot.started_ns,
+                started_at=slot.started_at,
+                completed_at=self._now_iso(),
+                order=slot.order,
+                work_dir=str(experiment_instance.work_dir),
+                run_id=experiment_instance.current_run_id,
             )
+            add_finished(record)
 
             if not success:
-                print(f"⚠️ 实验 {cfg.name} attempt {slot['attempt']} 失败 (code={return_code})")
-                if self._should_retry(cfg, slot["attempt"]):
+                print(f"⚠️ 实验 {cfg.name} attempt {slot.attempt} 失败 (code={return_code})")
+                if retries_enabled and slot.attempt < cfg.retry_budget:
                     print(f"↺ 将实验 {cfg.name} 重新排队")
-                    self._pending.insert(
-                        0,
-                        {
-                            "config": cfg,
-                            "order": slot.get("order", 0),
-                            "attempt": slot["attempt"],
-                            "id": self._new_task_id(),
-                            "created_at": datetime.now(tz=LOCAL_TZ),
-                        },
+                    pending_push(
+                        PendingTask(
+                            config=cfg,
+                            order=slot.order,
+                            attempt=slot.attempt,
+                            id=self._new_task_id(),
+                            created_at=self._now_iso(),
+                        ),
+                        front=True,  # 重试排到同优先级的最前面
                     )
 
+        if rescan and gated:
+            # 对应的 SIGCHLD 已被本轮消耗, 保留标记让下一轮继续检查, 不必等到 check_interval 兜底
+            self._child_exit_pending = True
+
+        harvested = len(self._active) - len(still_running)
         self._active = still_running
-        self._sync_state()
+        if harvested:
+            self._dirty = True
+            self._sync_state()
+        return harvested
+
+    def _add_finished(self, record: FinishedRecord) -> None:
+        self._finished[record.id] = record
+        self._finished_by_uid.setdefault(record.config.uid, {})[record.id] = record
+
+    def _pop_finished(self, task_id: str) -> Optional[FinishedRecord]:
+        record = self._finished.pop(task_id, None)
+        if record is not None:
+            group = self._finished_by_uid[record.config.uid]
+            del group[task_id]
+            if not group:
+                del self._finished_by_uid[record.config.uid]
+        return record
+
+    @staticmethod
+    def _poll_returncode(process: subprocess.Popen) -> Optional[int]:
+        """返回子进程退出码, 仍在运行时返回 None
+
+        后台输出线程读完输出后会调用 process.wait() 回收子进程并写入 returncode,
+        此时直接读取属性即可, 省去 poll() 内部的加锁与 waitpid 系统调用。
+        """
+        return_code = process.returncode
+        if return_code is not None:
+            return return_code
+        return process.poll()
+
+    @staticmethod
+    def _confirmed_running(process: subprocess.Popen) -> bool:
+        """poll() 返回 None 后确认子进程确实仍在运行
+
+        输出线程正在 process.wait() 中回收子进程时 poll() 会直接返回 None。这里用
+        waitid(WNOWAIT) 只查询不回收; 无法查询或子进程已被回收时都视为未确认。
+        """
+        waitid = getattr(os, "waitid", None)
+        if waitid is None:
+            return False
+        try:
+            return waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None
+        except ChildProcessError:  # 已被其他线程回收, returncode 即将写入
+            return False
 
     # ------------------------------------------------------------------
     # Helper
     # ------------------------------------------------------------------
     def _sync_state(self) -> None:
+        """把队列状态写入状态文件; 自上次写入以来没有任何变化时直接跳过"""
+        if self._sync_batch_depth or not self._dirty:
+            return
+        self._dirty = False
 
         def _build_queue(
-            records: Iterable[Dict[str, Any]],  # 某个队列 (pending / running / finished / errors)
+            records: Iterable[Any],  # 某个队列 (pending / running / finished / errors) 中的 NamedTuple 条目
             status: str # 这个队列对应的状态字符串值 ("pending" / "running" / "finished" / "errors")
         ) -> List[Dict[str, Any]]:
             output: List[Dict[str, Any]] = []   # 要把队列里每一个条目都转换成字典形式, 然后存到 output 列表里
+            append = output.append
+            serialize = self._serialize_scalar
+            format_ns = self._format_monotonic_ns
             for item in records:
-                cfg = item["config"]
-                payload = cfg.to_payload()  # 把 cfg 对象转为字典
-                payload.update(
+                # 配置部分只序列化一次; 用一个字典字面量一次性拼上运行时字段, 不再经过中间字典与 update
+                append(
                     {
-                        "id": self._serialize_scalar(item.get("id")),
+                        **item.config.payload,
+                        "id": serialize(item.id),
                         "status": status,   # 该条目所在队列的状态
-                        "raw_status": self._serialize_scalar(item.get("status", status)),   # 条目自己的状态
-                        "attempt": int(item.get("attempt", 0)),
-                        "created_at": self._format_dt(item.get("created_at")),
-                        "started_at": self._format_dt(item.get("started_at")),
-                        "completed_at": self._format_dt(item.get("completed_at")),
-                        "return_code": self._serialize_scalar(item.get("return_code")),
-                        "work_dir": self._serialize_scalar(item.get("work_dir")),   # 实际展开的绝对路径工作目录
-                        "run_id": self._serialize_scalar(item.get("run_id")),
+                        "raw_status": serialize(getattr(item, "status", status)),   # 条目自己的状态
+                        "attempt": int(item.attempt),
+                        # 时间字段在记录创建时已格式化为字符串, 这里直接读取
+                        "created_at": item.created_at,
+                        "started_at": getattr(item, "started_at", None)
+                        or format_ns(getattr(item, "started_ns", None)),
+                        "completed_at": getattr(item, "completed_at", None),
+                        "return_code": serialize(getattr(item, "return_code", None)),
+                        "work_dir": serialize(getattr(item, "work_dir", None)),   # 实际展开的绝对路径工作目录
+                        "run_id": serialize(getattr(item, "run_id", None)),
                     }
                 )
-                output.append(payload)
             return output
 
-        finished_records = [item for item in self._finished if item.get("status") == "success"]
-        error_records = [item for item in self._finished if item.get("status") != "success"]
+        finished_records = [item for item in self._finished.values() if item.status == "success"]
+        error_records = [item for item in self._finished.values() if item.status != "success"]
 
         summary = {
             "total": len(self._scheduled),
-            "pending": len(self._pending),
+            "pending": len(self._pending) + len(self._delayed),
             "running": len(self._active),
             "finished": len(finished_records),
             "errors": len(error_records),
@@ -506,31 +785,46 @@ class ExperimentScheduler:
 
         # 写入到文件
         self.state_store.write_state(
-            pending=_build_queue(self._pending, ExperimentStatus.PENDING.value),
+            pending=_build_queue(
+                itertools.chain((entry[2] for entry in sorted(self._delayed)), self._pending),
+                ExperimentStatus.PENDING.value,
+            ),
             running=_build_queue(self._active, ExperimentStatus.RUNNING.value),
             finished=_build_queue(finished_records, ExperimentStatus.FINISHED.value),
             errors=_build_queue(error_records, ExperimentStatus.ERROR.value),
             summary=summary,
         )
 
+    @contextmanager
+    def _batched_sync(self) -> Iterator[None]:
+        """批次内的 _sync_state 调用只标记变化, 退出批次时最多写入一次状态文件"""
+        self._sync_batch_depth += 1
+        try:
+            yield
+        finally:
+            self._sync_batch_depth -= 1
+        self._sync_state()
+
     def _new_task_id(self) -> str:
         self._task_counter += 1
         return f"task-{int(time.time())}-{self._task_counter:05d}"
 
-    @staticmethod
-    def _format_dt(value: Optional[datetime]) -> Optional[str]:
+    def _format_monotonic_ns(self, value: Optional[int]) -> Optional[str]:
         if value is None:
             return None
-        if isinstance(value, datetime):
-            if value.tzinfo is None:
-                value = value.replace(tzinfo=LOCAL_TZ)
-            return value.astimezone(LOCAL_TZ).isoformat()
-        return str(value)
+        timestamp = (value + self._wall_clock_offset_ns) / 1e9
+        return datetime.fromtimestamp(timestamp, tz=LOCAL_TZ).isoformat()
+
+    @staticmethod
+    def _now_iso() -> str:
+        """当前时间的 ISO 字符串; 每次都重新取时间, 完成/终止等事件的时间戳不会早于事件本身"""
+        return datetime.now(tz=LOCAL_TZ).isoformat()
 
     @staticmethod
     def _serialize_scalar(value: Any) -> Any:
-        if value is None:
-            return None
+        # 绝大多数字段本身就是 JSON 原生类型, 先用一次精确类型判断直接返回
+        if value is None or value.__class__ in _JSON_SCALAR_TYPES:
+            return value
         if isinstance(value, (str, int, float, bool)):
             return value
         if isinstance(value, datetime):
@@ -542,10 +836,13 @@ class ExperimentScheduler:
     # ------------------------------------------------------------------
     # 命令处理
     # ------------------------------------------------------------------
-    def _consume_commands(self) -> None:
+    def _consume_commands(self) -> int:
+        """执行 UI 下发的指令, 返回处理的指令数量"""
+        if not self.state_store.has_pending_commands():  # 绝大多数轮次没有新指令, 一次 stat 即可跳过
+            return 0
         commands = self.state_store.consume_commands()
         if not commands:
-            return
+            return 0
 
         for command in commands:
             action = command.get("action")
@@ -563,15 +860,22 @@ class ExperimentScheduler:
             elif action == "shutdown_scheduler":
                 self._handle_shutdown_scheduler()
 
+        self._dirty = True
         self._sync_state()
+        return len(commands)
 
     def _handle_remove_pending(self, payload: Dict[str, Any]) -> None:
         task_id = payload.get("id")
         if not task_id:
             return
-        before = len(self._pending)
-        self._pending = [item for item in self._pending if item.get("id") != task_id]
-        if len(self._pending) != before:
+        removed = self._pending.remove(task_id)
+        if not removed:
+            kept = [entry for entry in self._delayed if entry[2].id != task_id]
+            if len(kept) != len(self._delayed):
+                heapq.heapify(kept)
+                self._delayed = kept
+                removed = True
+        if removed:
             print(f"🗑️ 已移除 pending 任务 {task_id}")
 
     def _handle_terminate_running(self, payload: Dict[str, Any]) -> None:
@@ -579,10 +883,9 @@ class ExperimentScheduler:
         if not task_id:
             return
         for slot in list(self._active):
-            if slot.get("id") != task_id:
+            if slot.id != task_id:
                 continue
-            runtime = slot["experiment"]
-            process = runtime["process"]
+            process = slot.process
             
             # 更强力的进程终止逻辑
             print(f"🛑 开始终止运行任务 {task_id} (PID: {process.pid})")
@@ -591,23 +894,24 @@ class ExperimentScheduler:
                 print(f"⚠️ 任务 {task_id} 终止可能不完整 (PID: {process.pid})")
             
             # 设置实验实例错误状态        
-            runtime["instance"].set_error("terminated by user")
+            slot.instance.set_error("terminated by user")
             
             # 将任务移到完成列表
-            self._finished.append(
-                {
-                    "config": slot["config"],
-                    "status": "terminated",
-                    "attempt": slot["attempt"],
-                    "return_code": process.returncode,
-                    "id": slot.get("id", self._new_task_id()),
-                    "created_at": slot.get("created_at"),
-                    "started_at": slot.get("started_at"),
-                    "completed_at": datetime.now(tz=LOCAL_TZ),
-                    "work_dir": str(runtime["instance"].work_dir),
-                    "run_id": runtime["instance"].current_run_id,
-                }
+            record = FinishedRecord(
+                config=slot.config,
+                status="terminated",
+                attempt=slot.attempt,
+                return_code=process.returncode,
+                id=slot.id or self._new_task_id(),
+                created_at=slot.created_at,
+                started_ns=slot.started_ns,
+                started_at=slot.started_at,
+                completed_at=self._now_iso(),
+                order=slot.order,
+                work_dir=str(slot.instance.work_dir),
+                run_id=slot.instance.current_run_id,
             )
+            self._add_finished(record)
             self._active.remove(slot)
             print(f"🛑 用户终止运行任务 {task_id} 已完成")
             break
@@ -616,45 +920,36 @@ class ExperimentScheduler:
         task_id = payload.get("id")
         if not task_id:
             return
-        for record in list(self._finished):
-            if record.get("id") != task_id:
-                continue
-            if record.get("status") not in {"failed", "terminated"}:
-                return
-            cfg = record["config"]
-            self._pending.insert(
-                0,
-                {
-                    "config": cfg,
-                    "order": record.get("order", 0),
-                    "attempt": record.get("attempt", 0),
-                    "id": record.get("id", self._new_task_id()),
-                    "created_at": datetime.now(tz=LOCAL_TZ),
-                },
-            )
-            print(f"↻ 重新调度任务 {task_id}")
-            self._finished.remove(record)
-            break
+        record = self._finished.get(task_id)
+        if record is None or record.status not in {"failed", "terminated"}:
+            return
+        self._pending.push(
+            PendingTask(
+                config=record.config,
+                order=record.order,
+                attempt=record.attempt,
+                id=record.id,
+                created_at=self._now_iso(),
+            ),
+            front=True,
+        )
+        print(f"↻ 重新调度任务 {task_id}")
+        self._pop_finished(task_id)
 
     def _handle_remove_finished(self, payload: Dict[str, Any]) -> None:
         task_id = payload.get("id")
         if not task_id:
             return
-        before = len(self._finished)
-        self._finished = [item for item in self._finished if item.get("id") != task_id]
-        if len(self._finished) != before:
+        if self._pop_finished(task_id) is not None:
             print(f"🧹 已移除完成记录 {task_id}")
 
     def _handle_remove_error(self, payload: Dict[str, Any]) -> None:
         task_id = payload.get("id")
         if not task_id:
             return
-        removed = False
-        for record in list(self._finished):
-            if record.get("id") == task_id and record.get("status") in {"failed", "terminated"}:
-                self._finished.remove(record)
-                removed = True
-        if removed:
+        record = self._finished.get(task_id)
+        if record is not None and record.status in {"failed", "terminated"}:
+            self._pop_finished(task_id)
             print(f"🧹 已移除错误记录 {task_id}")
 
     def _handle_shutdown_scheduler(self) -> None:
@@ -664,7 +959,7 @@ class ExperimentScheduler:
         self._shutdown_requested = True
         self._status_indicator = "stopped"
 
-    def _terminate_process_tree(self, process, task_id: str) -> bool:
+    def _terminate_process_tree(self, process: subprocess.Popen, task_id: str) -> bool:
         """向整个进程组发送终止信号，必要时升级为强制杀死。"""
         if process.poll() is not None:
             print(f"ℹ️ 任务 {task_id} 已结束 (code={process.returncode})，无需再次终止")
@@ -683,7 +978,7 @@ class ExperimentScheduler:
 
         return process.poll() is not None
 
-    def _send_signal(self, process, *, force: bool) -> bool:
+    def _send_signal(self, process: subprocess.Popen, *, force: bool) -> bool:
         if process.poll() is not None:
             return False
         try:
@@ -707,7 +1002,7 @@ class ExperimentScheduler:
             print(f"⚠️ 无法向进程 {process.pid} 发送信号: {exc}")
             return False
 
-    def _wait_for_exit(self, process, *, timeout: float) -> bool:
+    def _wait_for_exit(self, process: subprocess.Popen, *, timeout: float) -> bool:
         if process.poll() is not None:
             return True
         try:
@@ -718,54 +1013,41 @@ class ExperimentScheduler:
         except Exception:
             return process.poll() is not None
 
-    def _should_retry(self, cfg: ScheduledExperiment, attempt: int) -> bool:
-        if not self.auto_restart:
-            return False
-        if cfg.max_retries <= 0:
-            return False
-        return attempt < cfg.max_retries + 1
-
     def _print_summary(self) -> None:
-        grouped: Dict[int, Dict[str, Any]] = {}
-        for record in self._finished:
-            cfg = record["config"]
-            key = id(cfg)
-            entry = grouped.setdefault(key, {"config": cfg, "records": []})
-            entry["records"].append(record)
-
+        # 记录已按配置 uid 分组, 每组求出首次成功的 attempt 即可分类
         success_without_retry = 0
         success_with_retry = 0
-        final_failure_ids: set[int] = set()
-
-        for entry in grouped.values():
-            records = entry["records"]
-            success_records = [item for item in records if item.get("status") == "success"]
-            if success_records:
-                first_success = min(success_records, key=lambda item: item["attempt"])
-                if first_success["attempt"] <= 1:
-                    success_without_retry += 1
-                else:
-                    success_with_retry += 1
+        final_failures = 0
+        failure_lines: List[str] = []
+        for group in self._finished_by_uid.values():
+            first_success: Optional[int] = None
+            failed_records: List[FinishedRecord] = []
+            for record in group.values():
+                if record.status == "success":
+                    if first_success is None or record.attempt < first_success:
+                        first_success = record.attempt
+                elif record.status == "failed":
+                    failed_records.append(record)
+
+            if first_success is None:
+                final_failures += 1
+            elif first_success <= 1:
+                success_without_retry += 1
             else:
-                final_failure_ids.add(id(entry["config"]))
+                success_with_retry += 1
+
+            marker = "🟡" if first_success is not None else "🔴"
+            for item in failed_records:
+                failure_lines.append(
+                    f"   - {marker} {item.config.name} "
+                    f"(attempt={item.attempt}, return_code={item.return_code})"
+                )
 
         print(
             "📊 调度完成: 直接成功 {} 个, 重试后成功 {} 个, 失败 {} 个".format(
-                success_without_retry, success_with_retry, len(final_failure_ids)
+                success_without_retry, success_with_retry, final_failures
             )
         )
 
-        failed_records = [item for item in self._finished if item.get("status") == "failed"]
-        if failed_records:
-            recovered_config_ids = {
-                id(entry["config"])
-                for entry in grouped.values()
-                if any(record.get("status") == "success" for record in entry["records"])
-            }
-            for item in failed_records:
-                cfg = item["config"]
-                marker = "🟡" if id(cfg) in recovered_config_ids else "🔴"
-                print(
-                    f"   - {marker} {cfg.name} "
-                    f"(attempt={item['attempt']}, return_code={item.get('return_code')})"
-                )
\ No newline at end of file
+        for line in failure_lines:
+            print(line)
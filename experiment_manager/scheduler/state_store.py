@@ -3,29 +3,51 @@
 该模块负责在磁盘上维护以下两个文件：
 
 - ``scheduler_state.json``：记录当前调度器的 Pending/Running/Finished/Error 实验列表。
-- ``commands.json``：UI 写入的命令队列，调度器消费后会自动清空。
+- ``commands.jsonl``：UI 写入的命令队列，每行一条命令，调度器消费后会自动清空。
 
-文件放置在 ``<base_experiment_dir>/.exp_state`` 目录下，写入采用原子替换以尽量避免并发竞争。
+文件放置在 ``<base_experiment_dir>/.exp_state`` 目录下。状态文件写入采用原子替换，
+命令以 ``O_APPEND`` 追加写入；追加与消费 (读取后清空) 都持有命令文件的 ``flock``，
+保证不会有命令写进已被读走的内容之后而丢失。
 """
 from __future__ import annotations
 
-import json
 import os
 import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, MutableMapping, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+try:  # pragma: no cover - Windows 下没有 fcntl
+    import fcntl
+except ImportError:  # pragma: no cover - 退化为仅进程内加锁
+    fcntl = None  # type: ignore
+
+from experiment_manager.utils import jsonio
+
 LOCAL_TZ = ZoneInfo("Asia/Shanghai")
 ISO_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%f%z"
 
 
-def _format_iso(dt: datetime) -> str:
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=LOCAL_TZ)
-    return dt.astimezone(LOCAL_TZ).isoformat()
+def _now_iso() -> str:
+    # datetime.now 直接得到本地时区的时间, 无需再做 replace / astimezone 换算
+    return datetime.now(tz=LOCAL_TZ).isoformat()
+
+
+def _as_list(items: Iterable[Any]) -> List[Any]:
+    return items if isinstance(items, list) else list(items)
+
+
+def _freeze(value: Any) -> Any:
+    """把解析出的 JSON 递归转成只读结构: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
 
 
 @dataclass
@@ -34,8 +56,21 @@ class SchedulerCommand:
 
     action: str
     payload: Dict[str, Any] = field(default_factory=dict)
-    id: str = field(default_factory=lambda: datetime.now(tz=LOCAL_TZ).strftime("%Y%m%d%H%M%S%f"))
-    created_at: str = field(default_factory=lambda: _format_iso(datetime.now(tz=LOCAL_TZ)))
+    id: str = ""    # 为空时由创建时间生成, 形如 20250927120000123456
+    created_at: str = ""
+
+    def __post_init__(self) -> None:
+        if self.id and self.created_at:
+            return
+        # id 与 created_at 共用一次取时, 直接拼接整数字段, 不走 strftime
+        now = datetime.now(tz=LOCAL_TZ)
+        if not self.id:
+            self.id = (
+                f"{now.year:04d}{now.month:02d}{now.day:02d}"
+                f"{now.hour:02d}{now.minute:02d}{now.second:02d}{now.microsecond:06d}"
+            )
+        if not self.created_at:
+            self.created_at = now.isoformat()
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -54,20 +89,35 @@ class SchedulerStateStore:
         self.state_dir = self.base_dir / ".exp_state"
         self.state_dir.mkdir(parents=True, exist_ok=True)
         self.state_path = self.state_dir / "scheduler_state.json"   # 用来保存调度器状态
-        self.command_path = self.state_dir / "commands.json"    # 用来保存 ui 下传的命令
+        self.command_path = self.state_dir / "commands.jsonl"    # 用来保存 ui 下传的命令, 每行一条
+        self._legacy_command_path = self.state_dir / "commands.json"  # 旧版本的命令文件 (整个 JSON 数组)
         self._lock = threading.Lock()
+        # 最近一次解析的状态文件: ((inode, 大小, mtime_ns), 解析结果); UI 轮询时文件多半没变, 直接复用
+        self._state_cache: Optional[Tuple[Tuple[int, int, int], Mapping[str, Any]]] = None
 
-        # 初始化一下 scheduler_state.json 和 commands.json 文件
+        # 初始化一下 scheduler_state.json 和 commands.jsonl 文件
         if not self.state_path.exists():
             self._write_json(self.state_path, self._initial_state())
-        if not self.command_path.exists():
-            self._write_json(self.command_path, [])
+        self.command_path.touch(exist_ok=True)
+        self._migrate_legacy_commands()
 
     # ------------------------------------------------------------------
     # 状态文件操作
     # ------------------------------------------------------------------
-    def load_state(self) -> Dict[str, Any]:
-        return self._read_json(self.state_path)
+    def load_state(self) -> Mapping[str, Any]:
+        """读取调度器状态; 文件未变化时返回缓存的同一个对象
+
+        返回的是只读结构 (dict 为 MappingProxyType, list 为 tuple), 所有调用方共享它也不会被意外修改。
+        """
+        stat = self._file_stat(self.state_path)
+        cache = self._state_cache
+        if stat is not None and cache is not None and cache[0] == stat:
+            return cache[1]
+        state = _freeze(self._read_json(self.state_path))
+        # 读取前后文件签名一致才缓存, 避免缓存到与签名不符的内容
+        if stat is not None and stat == self._file_stat(self.state_path):
+            self._state_cache = (stat, state)
+        return state
 
     def write_state(
         self,
@@ -78,12 +128,13 @@ class SchedulerStateStore:
         errors: Iterable[MutableMapping[str, Any]],
         summary: Optional[Dict[str, Any]] = None,
     ) -> None:
+        # 调度器传入的已经是列表, 直接交给编码器, 不再复制; 其他可迭代对象才需要先物化
         data = {
-            "updated_at": _format_iso(datetime.now(tz=LOCAL_TZ)),
-            "pending": list(pending),
-            "running": list(running),
-            "finished": list(finished),
-            "errors": list(errors),
+            "updated_at": _now_iso(),
+            "pending": _as_list(pending),
+            "running": _as_list(running),
+            "finished": _as_list(finished),
+            "errors": _as_list(errors),
             "summary": summary or {},
         }
         self._write_json(self.state_path, data)
@@ -92,31 +143,78 @@ class SchedulerStateStore:
     # 命令队列操作
     # ------------------------------------------------------------------
     def enqueue_command(self, command: SchedulerCommand) -> None:
-        with self._lock:
-            commands = self._read_json(self.command_path)
-            if not isinstance(commands, list):
-                commands = []
-            commands.append(command.to_dict())
-            self._write_json(self.command_path, commands)
+        # 只追加一行, 不读取已有命令; O_APPEND 下的单次小写入是原子的, 多个 UI 进程同时写也不会交错
+        line = jsonio.dumps(command.to_dict()) + b"\n"
+        with self._locked_command_file(os.O_WRONLY | os.O_APPEND) as fd:
+            os.write(fd, line)
 
     def consume_commands(self) -> List[Dict[str, Any]]:
-        with self._lock:
-            commands = self._read_json(self.command_path)
-            self._write_json(self.command_path, [])
-        if isinstance(commands, list):
-            return commands
-        return []
+        # 读取与清空在同一把文件锁内完成, 期间到达的命令会等锁释放后再追加, 留到下一次消费
+        with self._lock, self._locked_command_file(os.O_RDWR) as fd:
+            with os.fdopen(fd, "rb", closefd=False) as fh:
+                data = fh.read()
+            if data:
+                os.ftruncate(fd, 0)
+
+        # 正常写入都在锁内一次写完整行; 锁内仍读到没有换行结尾的残行, 只可能是写入进程中途退出留下的, 直接丢弃
+        data = data[: data.rfind(b"\n") + 1]
+        commands: List[Dict[str, Any]] = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                command = jsonio.loads(line)
+            except jsonio.JSONDecodeError:
+                continue  # 损坏的行 (例如写入被中断) 直接跳过, 不影响其他命令
+            if isinstance(command, dict):
+                commands.append(command)
+        return commands
 
     def has_pending_commands(self) -> bool:
-        data = self._read_json(self.command_path)
-        return bool(data)
+        """是否有待处理的命令; 只需 stat, 不读取文件内容
+
+        只看文件大小, 因此写入中途退出留下的残行也会被当作有命令 (假阳性)。
+        这种情况下 consume_commands 会丢弃残行并清空文件, 返回空列表, 下一次检查即恢复为 False。
+        """
+        try:
+            return os.path.getsize(self.command_path) > 0
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _locked_command_file(self, flags: int) -> Iterator[int]:
+        """打开命令文件并持有排他 flock, 退出时关闭文件 (同时释放锁)"""
+        fd = os.open(self.command_path, flags | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)
+
+    def _migrate_legacy_commands(self) -> None:
+        """把旧版本 commands.json 里尚未消费的命令追加到 commands.jsonl, 然后删除旧文件"""
+        if not self._legacy_command_path.exists():
+            return
+        with self._locked_command_file(os.O_WRONLY | os.O_APPEND) as fd:
+            # 拿到锁后再确认一次, 避免多个进程同时启动时重复迁移
+            if not self._legacy_command_path.exists():
+                return
+            commands = self._read_json(self._legacy_command_path)
+            if isinstance(commands, list):
+                lines = b"".join(
+                    jsonio.dumps(command) + b"\n" for command in commands if isinstance(command, dict)
+                )
+                if lines:
+                    os.write(fd, lines)
+            self._legacy_command_path.unlink()
 
     # ------------------------------------------------------------------
     # 工具方法
     # ------------------------------------------------------------------
     def _initial_state(self) -> Dict[str, Any]:
         return {
-            "updated_at": _format_iso(datetime.now(tz=LOCAL_TZ)),
+            "updated_at": _now_iso(),
             "pending": [],
             "running": [],
             "finished": [],
@@ -133,21 +231,27 @@ class SchedulerStateStore:
             },
         }
 
+    @staticmethod
+    def _file_stat(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # 写入都经过 os.replace, 每次写入都会换一个 inode, 即使 mtime 精度不足也能分辨
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
     def _read_json(self, path: Path) -> Any:
         if not path.exists():
-            return [] if path == self.command_path else self._initial_state()
+            return self._initial_state()
         try:
-            with open(path, "r", encoding="utf-8") as fh:
-                return json.load(fh)
-        except json.JSONDecodeError:
+            # 一次读出字节直接交给解析器, 省去文本模式的逐块解码
+            return jsonio.loads(path.read_bytes())
+        except jsonio.JSONDecodeError:
             # 文件损坏时兜底返回空，避免阻塞主流程
-            return [] if path == self.command_path else self._initial_state()
+            return self._initial_state()
 
     def _write_json(self, path: Path, data: Any) -> None:
-        tmp_path = path.with_suffix(".tmp")
-        with open(tmp_path, "w", encoding="utf-8") as fh:
-            json.dump(data, fh, ensure_ascii=False, indent=2)
-        os.replace(tmp_path, path)
+        jsonio.dump_file(path, data, indent=True)
 
 
 __all__ = ["SchedulerStateStore", "SchedulerCommand", "ISO_TIMESTAMP", "LOCAL_TZ"]
@@ -1,6 +1,30 @@
-"""UI 服务入口模块。"""
-from experiment_manager.ui.server import create_app
-from experiment_manager.ui.service import SchedulerUISession
-from experiment_manager.ui.cli import run_ui
+"""UI 服务入口模块。
+
+子模块在首次访问对应属性时才导入 (PEP 562), 这样只用到 CLI 时不会连带导入 fastapi / uvicorn。
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+_LAZY_ATTRS = {
+    "create_app": "experiment_manager.ui.server",
+    "SchedulerUISession": "experiment_manager.ui.service",
+    "run_ui": "experiment_manager.ui.cli",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
+
 
 __all__ = ["create_app", "SchedulerUISession", "run_ui"]
@@ -4,14 +4,10 @@ from __future__ import annotations
 import argparse
 import socket
 import sys
-import webbrowser
 from pathlib import Path
 from typing import List
 
-import uvicorn
-
-from experiment_manager.ui.server import create_app
-from experiment_manager.ui.service import SchedulerUISession
+# uvicorn / fastapi / 调度器等较重的依赖都在对应子命令的处理函数里再导入, 避免拖慢 CLI 启动
 
 DEFAULT_PORT = 6066
 
@@ -26,7 +22,6 @@ def build_ui_parser(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口，默认 6066")
     parser.add_argument("--no-browser", action="store_true", help="启动时不自动打开浏览器")
     parser.add_argument("--open-browser", action="store_true", help="强制打开浏览器")
-    parser.set_defaults(func=handle_see_ui)
 
 
 def build_run_parser(parser: argparse.ArgumentParser) -> None:
@@ -41,7 +36,6 @@ def build_run_parser(parser: argparse.ArgumentParser) -> None:
         action="store_true",
         help="仅显示执行计划，不真正启动实验",
     )
-    parser.set_defaults(func=handle_run_scheduler)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -97,6 +91,13 @@ def handle_see_ui(args: argparse.Namespace) -> None:
 
 
 def run_ui(args: argparse.Namespace) -> None:
+    import webbrowser
+
+    import uvicorn
+
+    from experiment_manager.ui.server import create_app
+    from experiment_manager.ui.service import SchedulerUISession
+
     logdir = args.logdir.expanduser().resolve()
     if not logdir.exists():
         print(f"⚠️ 指定的实验目录不存在: {logdir}", file=sys.stderr)
@@ -121,17 +122,25 @@ def run_ui(args: argparse.Namespace) -> None:
     server.run()
 
 
+# 子命令名 -> 处理函数
+_COMMAND_HANDLERS = {
+    "run": handle_run_scheduler,
+    "see": handle_see_ui,
+}
+
+
 def main(argv: List[str] | None = None) -> None:
     parser = build_parser()
     args = parser.parse_args(argv)
     
     # 如果没有提供子命令，显示帮助信息
-    if not hasattr(args, 'func'):
+    handler = _COMMAND_HANDLERS.get(args.command)
+    if handler is None:
         parser.print_help()
         return
     
     # 调用对应的处理函数
-    args.func(args)
+    handler(args)
 
 
 __all__ = ["run_ui", "main", "handle_run_scheduler", "handle_see_ui"]
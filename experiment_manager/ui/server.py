@@ -2,17 +2,25 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from experiment_manager.ui.service import SchedulerUISession
+from experiment_manager.utils import jsonio
+
+
+class FastJSONResponse(JSONResponse):
+    """一次编码直接得到 UTF-8 字节的 JSON 响应 (安装了 orjson 时使用 orjson)"""
+
+    def render(self, content: Any) -> bytes:
+        return jsonio.dumps(content)
 
 
 def create_app(session: SchedulerUISession) -> FastAPI:
-    app = FastAPI(title="EXP UI", version="0.1.0")
+    app = FastAPI(title="EXP UI", version="0.1.0", default_response_class=FastJSONResponse)
 
     static_dir = Path(__file__).resolve().parent / "static"
     if static_dir.exists():
@@ -23,21 +31,24 @@ def create_app(session: SchedulerUISession) -> FastAPI:
     def get_session() -> SchedulerUISession:
         return session
 
+    # 首页是打包在安装目录里的静态文件, 创建应用时读一次即可, 之后每次请求直接返回同一份字节
+    index_path = static_dir / "index.html"
+    index_html = index_path.read_bytes() if index_path.exists() else None
+
     @app.get("/", response_class=HTMLResponse)
     async def index() -> HTMLResponse:
-        index_path = static_dir / "index.html"
-        if not index_path.exists():
+        if index_html is None:
             raise HTTPException(status_code=404, detail="index.html missing")
-        return HTMLResponse(index_path.read_text(encoding="utf-8"))
+        return HTMLResponse(index_html)
 
     @router.get("/state")
-    async def state(current: SchedulerUISession = Depends(get_session)) -> JSONResponse:
-        return JSONResponse(current.get_state())
+    async def state(current: SchedulerUISession = Depends(get_session)) -> FastJSONResponse:
+        return FastJSONResponse(current.get_state())
 
     @router.get("/tasks/{task_id}")
-    async def task_details(task_id: str, current: SchedulerUISession = Depends(get_session)) -> JSONResponse:
+    async def task_details(task_id: str, current: SchedulerUISession = Depends(get_session)) -> FastJSONResponse:
         try:
-            return JSONResponse(current.get_task_details(task_id))
+            return FastJSONResponse(current.get_task_details(task_id))
         except KeyError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
 
@@ -47,33 +58,40 @@ def create_app(session: SchedulerUISession) -> FastAPI:
         run_id: Optional[str] = Query(default=None),
         tail: int = Query(default=200, ge=10, le=5000),
         current: SchedulerUISession = Depends(get_session),
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         try:
             data = current.read_log(task_id, run_id=run_id, tail=tail)
-            return JSONResponse(data)
+            return FastJSONResponse(data)
         except FileNotFoundError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         except KeyError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
 
     @router.get("/tasks/{task_id}/metrics/{filename}")
-    async def metric_file(task_id: str, filename: str, current: SchedulerUISession = Depends(get_session)) -> JSONResponse:
+    async def metric_file(
+        task_id: str,
+        filename: str,
+        fmt: str = Query(default="json", alias="format", pattern="^(json|ndjson)$", description="ndjson 时逐行流式返回"),
+        current: SchedulerUISession = Depends(get_session),
+    ) -> Response:
         try:
-            return JSONResponse(current.read_metric(task_id, filename))
+            if fmt == "ndjson":
+                return StreamingResponse(current.stream_metric(task_id, filename), media_type="application/x-ndjson")
+            return FastJSONResponse(current.read_metric(task_id, filename))
         except FileNotFoundError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         except KeyError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
 
     @router.post("/commands")
-    async def enqueue_command(request: Request, current: SchedulerUISession = Depends(get_session)) -> JSONResponse:
+    async def enqueue_command(request: Request, current: SchedulerUISession = Depends(get_session)) -> FastJSONResponse:
         payload = await request.json()
         action = payload.get("action")
         if not action:
             raise HTTPException(status_code=400, detail="action required")
         command_payload = payload.get("payload") or {}
         command = current.send_command(action, command_payload)
-        return JSONResponse({"status": "accepted", "command": command})
+        return FastJSONResponse({"status": "accepted", "command": command})
 
     @router.get("/experiments/search")
     async def search_experiments(
@@ -83,7 +101,7 @@ def create_app(session: SchedulerUISession) -> FastAPI:
         start_time: Optional[str] = Query(default=None, description="开始时间 (ISO format)"),
         end_time: Optional[str] = Query(default=None, description="结束时间 (ISO format)"),
         current: SchedulerUISession = Depends(get_session),
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         try:
             tag_list = []
             if tags:
@@ -96,7 +114,7 @@ def create_app(session: SchedulerUISession) -> FastAPI:
                 start_time=start_time,
                 end_time=end_time,
             )
-            return JSONResponse(experiments)
+            return FastJSONResponse(experiments)
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"搜索失败: {str(exc)}") from exc
 
@@ -104,10 +122,10 @@ def create_app(session: SchedulerUISession) -> FastAPI:
     async def get_experiment_files(
         experiment_path: str,
         current: SchedulerUISession = Depends(get_session),
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         try:
             files = current.get_experiment_files(experiment_path)
-            return JSONResponse(files)
+            return FastJSONResponse(files)
         except Exception as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
 
@@ -115,10 +133,10 @@ def create_app(session: SchedulerUISession) -> FastAPI:
     async def read_file(
         file_path: str = Query(description="文件绝对路径"),
         current: SchedulerUISession = Depends(get_session),
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         try:
             content = current.read_experiment_file(file_path)
-            return JSONResponse(content)
+            return FastJSONResponse(content)
         except FileNotFoundError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         except ValueError as exc:
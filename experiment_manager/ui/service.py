@@ -3,22 +3,83 @@ from __future__ import annotations
 
 import asyncio
 import csv
-import json
+import io
+import os
 import re
 from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from experiment_manager.scheduler.state_store import (
+    LOCAL_TZ,
     SchedulerCommand,
     SchedulerStateStore,
 )
+from experiment_manager.utils import jsonio
+
+try:  # pragma: no cover - 可选依赖 (uvicorn[standard] 会一并安装)
+    from watchfiles import awatch
+except ModuleNotFoundError:  # pragma: no cover - 未安装时回退到每秒轮询
+    awatch = None  # type: ignore
+
+_TAIL_BLOCK_SIZE = 64 * 1024  # 从日志末尾向前读取时每次读取的字节数
+_METRIC_BLOCK_SIZE = 1024 * 1024  # 统计指标文件行数时每次读取的字节数
+_METRIC_SAMPLE_ROWS = 5  # 指标概要中展示的样例行数
+_LOG_WATCH_DEBOUNCE_MS = 50  # watchfiles 合并文件变化事件的窗口 (毫秒); 默认 1600ms 对持续输出的日志太慢
+_LOG_WATCH_STEP_MS = 20  # watchfiles 在合并窗口内检查新事件的间隔 (毫秒)
+_LOG_POLL_INTERVAL_MS = 1000  # 超过该时间没有事件也检查一次日志, 兼容收不到 inotify 事件的 NFS 等网络文件系统
+
+
+@lru_cache(maxsize=4096)
+def _format_mtime_ns(mtime_ns: int) -> str:
+    """把文件修改时间 (st_mtime_ns) 格式化为本地时区的 ISO 字符串; 未修改的文件重复请求时直接命中缓存"""
+    seconds, nanos = divmod(mtime_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, tz=LOCAL_TZ).replace(microsecond=nanos // 1000).isoformat()
+
+
+@lru_cache(maxsize=256)
+def _read_metric_preview(
+    path: str, mtime_ns: int, size: int
+) -> Tuple[List[str], List[Dict[str, Any]], int]:
+    """一次遍历读出 CSV 的列名、前几行样例与数据行数
+
+    mtime_ns 与 size 只作为缓存键的一部分: 文件没变时重复查看任务详情不会再读文件。
+    """
+    with open(path, "rb") as fh:
+        # 先读到足够解析表头和样例行的内容
+        head = fh.read(_METRIC_BLOCK_SIZE)
+        while head.count(b"\n") <= _METRIC_SAMPLE_ROWS:
+            block = fh.read(_METRIC_BLOCK_SIZE)
+            if not block:
+                break
+            head += block
+        head_newlines = head.count(b"\n")
+        newlines = head_newlines
+        last_byte = head[-1:]
+        # 其余部分只数换行, 不解码也不解析
+        for block in iter(lambda: fh.read(_METRIC_BLOCK_SIZE), b""):
+            newlines += block.count(b"\n")
+            last_byte = block[-1:]
+
+    if head_newlines > _METRIC_SAMPLE_ROWS:
+        head = head[: head.rfind(b"\n") + 1]  # 只解析完整的行, 块末尾被截断的半行不参与
+    reader = csv.DictReader(io.StringIO(head.decode("utf-8")))
+    sample = [row for _, row in zip(range(_METRIC_SAMPLE_ROWS), reader)]
+    columns = reader.fieldnames or []
+    # 最后一行没有换行结尾时也算一行
+    lines = newlines + (1 if last_byte and last_byte != b"\n" else 0)
+    return columns, sample, max(lines - 1, 0)
 
 
 @dataclass
 class MetricPreview:
     """指标文件的概要信息。"""
 
+    # 所有字段都没有默认值, 可以直接声明 __slots__ (Python 3.9 的 dataclass 还不支持 slots=True)
+    __slots__ = ("name", "rows", "columns", "sample")
+
     name: str
     rows: int
     columns: List[str]
@@ -39,20 +100,28 @@ class SchedulerUISession:
     def __init__(self, base_experiment_dir: Path):
         self.base_dir = Path(base_experiment_dir).expanduser().resolve()
         self.state_store = SchedulerStateStore(self.base_dir)
+        # (建索引时的状态对象, task id -> (所在分区, 记录)); 状态文件未变化时 load_state 返回同一个只读对象, 索引可直接复用
+        self._task_index: Optional[Tuple[Mapping[str, Any], Dict[str, Tuple[str, Mapping[str, Any]]]]] = None
 
     # ------------------------------------------------------------------
     # 状态访问
     # ------------------------------------------------------------------
-    def get_state(self) -> Dict[str, Any]:
+    def get_state(self) -> Mapping[str, Any]:
         return self.state_store.load_state()
 
-    def find_task(self, task_id: str) -> Tuple[str, Dict[str, Any]]:
+    def find_task(self, task_id: str) -> Tuple[str, Mapping[str, Any]]:
         state = self.get_state()
-        for section in ("pending", "running", "finished", "errors"):
-            for item in state.get(section, []):
-                if item.get("id") == task_id:
-                    return section, item
-        raise KeyError(f"task {task_id} not found")
+        cached = self._task_index
+        if cached is None or cached[0] is not state:
+            index: Dict[str, Tuple[str, Mapping[str, Any]]] = {}
+            for section in ("pending", "running", "finished", "errors"):
+                for item in state.get(section, []):
+                    index.setdefault(item.get("id"), (section, item))  # 同一 id 出现多次时以先出现的为准
+            cached = self._task_index = (state, index)
+        try:
+            return cached[1][task_id]
+        except KeyError:
+            raise KeyError(f"task {task_id} not found") from None
 
     # ------------------------------------------------------------------
     # 任务详情
@@ -100,14 +169,7 @@ class SchedulerUISession:
         }
 
     def read_metric(self, task_id: str, filename: str, limit: int = 200) -> Dict[str, Any]:
-        _, record = self.find_task(task_id)
-        work_dir = record.get("work_dir")
-        if not work_dir:
-            raise FileNotFoundError("指标目录尚未生成")
-        metrics_dir = Path(work_dir) / "metrics"
-        target = metrics_dir / filename
-        if not target.exists() or not target.is_file():
-            raise FileNotFoundError(f"未找到指标文件: {target}")
+        target = self._resolve_metric_file(task_id, filename)
 
         if target.suffix.lower() == ".csv":
             with open(target, "r", encoding="utf-8") as fh:
@@ -132,6 +194,45 @@ class SchedulerUISession:
                 "data": data,
             }
 
+    def stream_metric(self, task_id: str, filename: str, limit: int = 200) -> Iterator[bytes]:
+        """以 JSON Lines 逐行产出指标内容, 内存占用与行数无关
+
+        第一行是元信息 ({"type": "csv", "columns": [...]} 或 {"type": "json"}),
+        之后每行一条记录: CSV 为按列顺序排列的值列表, JSON 数组为其中的一个元素。
+        找不到文件时在调用时立即抛出 FileNotFoundError, 而不是在开始产出之后。
+        """
+        target = self._resolve_metric_file(task_id, filename)
+        if target.suffix.lower() == ".csv":
+            return self._stream_csv_rows(target, limit)
+        return self._stream_json_items(target, limit)
+
+    def _resolve_metric_file(self, task_id: str, filename: str) -> Path:
+        _, record = self.find_task(task_id)
+        work_dir = record.get("work_dir")
+        if not work_dir:
+            raise FileNotFoundError("指标目录尚未生成")
+        metrics_dir = Path(work_dir) / "metrics"
+        target = metrics_dir / filename
+        if not target.exists() or not target.is_file():
+            raise FileNotFoundError(f"未找到指标文件: {target}")
+        return target
+
+    @staticmethod
+    def _stream_csv_rows(target: Path, limit: int) -> Iterator[bytes]:
+        with open(target, "r", encoding="utf-8", newline="") as fh:
+            reader = csv.reader(fh)
+            columns = next(reader, [])
+            yield jsonio.dumps({"type": "csv", "columns": columns}) + b"\n"
+            for _, row in zip(range(limit), reader):
+                yield jsonio.dumps(row) + b"\n"
+
+    def _stream_json_items(self, target: Path, limit: int) -> Iterator[bytes]:
+        yield jsonio.dumps({"type": "json"}) + b"\n"
+        data = self._load_json(target)
+        items = data[:limit] if isinstance(data, list) else [data]
+        for item in items:
+            yield jsonio.dumps(item) + b"\n"
+
     # ------------------------------------------------------------------
     # 命令下发
     # ------------------------------------------------------------------
@@ -257,7 +358,7 @@ class SchedulerUISession:
                             "path": rel_path,
                             "absolute_path": str(item),
                             "size": stat.st_size,
-                            "modified": self._format_timestamp(stat.st_mtime),
+                            "modified": _format_mtime_ns(stat.st_mtime_ns),
                             "type": "file"
                         })
                     elif item.is_dir() and not item.name.startswith('.'):
@@ -376,50 +477,123 @@ class SchedulerUISession:
 
         await send_callable({"event": "info", "message": f"监听日志: {log_path}"})
 
-        position = 0
+        # 整个连接期间只打开一次日志文件, 每次有变化时从上次读到的位置继续读
+        fh: Optional[BinaryIO] = None
+        carry = b""  # 上次读取末尾被截断的多字节字符
+        after_cr = False  # 上次读取是否以 \r 结尾 (紧随其后的 \n 属于同一个换行)
         try:
-            while True:
-                if not log_path.exists():
-                    await asyncio.sleep(1)
+            async for _ in self._log_change_events(log_path):
+                if fh is not None and self._log_replaced(fh, log_path):
+                    fh.close()
+                    fh = None
+                    carry, after_cr = b"", False
+                if fh is None:
+                    try:
+                        fh = open(log_path, "rb")
+                    except FileNotFoundError:
+                        continue
+
+                chunk = fh.read()
+                if not chunk:
                     continue
-
-                new_lines: List[str] = []
-                with open(log_path, "r", encoding="utf-8", errors="ignore") as fh:
-                    fh.seek(position)
-                    chunk = fh.read()
-                    position = fh.tell()
-                if chunk:
-                    new_lines = [line for line in chunk.splitlines()]
-
+                if after_cr and chunk.startswith(b"\n"):
+                    chunk = chunk[1:]
+                after_cr = chunk.endswith(b"\r")
+                new_lines, carry = self._split_log_chunk(carry + chunk)
                 if new_lines:
                     await send_callable({
                         "event": "append",
                         "lines": new_lines,
                     })
-
-                await asyncio.sleep(1)
         except asyncio.CancelledError:
             raise
+        finally:
+            if fh is not None:
+                fh.close()
+
+    @staticmethod
+    def _split_log_chunk(data: bytes) -> Tuple[List[str], bytes]:
+        """在字节层面一次切分出各行再逐行解码; 末尾被截断的多字节字符留给下一次读取"""
+        lines = data.splitlines()
+        carry = b""
+        if lines and not data.endswith((b"\n", b"\r")):
+            last = lines[-1]
+            try:
+                last.decode("utf-8")
+            except UnicodeDecodeError as exc:
+                if exc.reason == "unexpected end of data":
+                    carry = last[exc.start:]
+                    lines[-1] = last[: exc.start]
+                    if not lines[-1]:
+                        lines.pop()
+        return [line.decode("utf-8", errors="ignore") for line in lines], carry
+
+    @staticmethod
+    async def _log_change_events(log_path: Path) -> AsyncIterator[None]:
+        """日志可能有新内容时产出一次: 开始时立即产出, 之后安装了 watchfiles 就等待文件变化事件, 否则每秒轮询
+
+        watchfiles 超时无事件时同样产出一次, 事件丢失时退化为与未安装时相同的每秒轮询, 不会一直挂起。
+        """
+        yield
+        if awatch is not None:
+            target = str(log_path)
+            async for _ in awatch(
+                log_path.parent,
+                watch_filter=lambda _change, path: path == target,
+                debounce=_LOG_WATCH_DEBOUNCE_MS,
+                step=_LOG_WATCH_STEP_MS,
+                rust_timeout=_LOG_POLL_INTERVAL_MS,
+                yield_on_timeout=True,
+            ):
+                yield
+        while True:
+            await asyncio.sleep(_LOG_POLL_INTERVAL_MS / 1000)
+            yield
+
+    @staticmethod
+    def _log_replaced(fh: BinaryIO, log_path: Path) -> bool:
+        """日志文件被删除或替换 (例如轮转) 时需要重新打开"""
+        try:
+            return os.stat(log_path).st_ino != os.fstat(fh.fileno()).st_ino
+        except FileNotFoundError:
+            return True
 
     # ------------------------------------------------------------------
     # 内部工具
     # ------------------------------------------------------------------
     def _list_terminal_logs(self, work_dir: Path) -> List[Dict[str, Any]]:
-        terminal_dir = work_dir / "terminal_logs"
-        if not terminal_dir.exists():
-            return []
+        logs, _ = self._scan_terminal_logs(work_dir)
+        logs.sort(key=lambda item: item["name"])
+        return logs
+
+    def _scan_terminal_logs(self, work_dir: Path) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """一次 os.scandir 列出终端日志 (未排序), 同时找出最近修改的日志文件名"""
         result: List[Dict[str, Any]] = []
-        for path in sorted(terminal_dir.glob("*.log")):
-            stat = path.stat()
-            result.append(
-                {
-                    "name": path.name,
-                    "run_id": path.stem,
-                    "size": stat.st_size,
-                    "updated_at": self._format_timestamp(stat.st_mtime),
-                }
-            )
-        return result
+        latest_name: Optional[str] = None
+        latest_mtime = -1
+        try:
+            entries = os.scandir(work_dir / "terminal_logs")
+        except (FileNotFoundError, NotADirectoryError):
+            return result, None
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".log") or name.startswith(".") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                result.append(
+                    {
+                        "name": name,
+                        "run_id": name[: -len(".log")],
+                        "size": stat.st_size,
+                        "updated_at": _format_mtime_ns(stat.st_mtime_ns),
+                    }
+                )
+                # 修改时间相同时取文件名较小的, 与按文件名排序后取第一个最大值的结果一致
+                mtime = stat.st_mtime_ns
+                if mtime > latest_mtime or (mtime == latest_mtime and name < latest_name):
+                    latest_name, latest_mtime = name, mtime
+        return result, latest_name
 
     def _list_metric_previews(self, work_dir: Path) -> List[MetricPreview]:
         metrics_dir = work_dir / "metrics"
@@ -430,63 +604,64 @@ class SchedulerUISession:
         for path in sorted(metrics_dir.iterdir()):
             if path.suffix.lower() != ".csv":
                 continue
-            with open(path, "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                rows = []
-                for idx, row in enumerate(reader):
-                    if idx >= 5:
-                        break
-                    rows.append(row)
-                columns = reader.fieldnames or []
+            stat = path.stat()
+            columns, sample, rows = _read_metric_preview(str(path), stat.st_mtime_ns, stat.st_size)
             previews.append(
                 MetricPreview(
                     name=path.name,
-                    rows=max(self._count_file_rows(path) - 1, 0),
-                    columns=columns,
-                    sample=rows,
+                    rows=rows,
+                    columns=list(columns),  # 缓存结果会被多次返回, 交出去的是副本
+                    sample=[dict(row) for row in sample],
                 )
             )
         return previews
 
     def _resolve_log_path(self, work_dir: Path, run_id: Optional[str]) -> Optional[Path]:
-        logs = self._list_terminal_logs(work_dir)
-        if not logs:
-            return None
         if run_id:
             candidate = work_dir / "terminal_logs" / f"{run_id}.log"
-            if candidate.exists():
+            if candidate.is_file():
                 return candidate
         # fallback to last log
-        latest = max(logs, key=lambda item: item.get("updated_at") or "")
-        return work_dir / "terminal_logs" / latest["name"]
+        _, latest_name = self._scan_terminal_logs(work_dir)
+        if latest_name is None:
+            return None
+        return work_dir / "terminal_logs" / latest_name
 
     @staticmethod
     def _tail_file(path: Path, limit: int) -> List[str]:
         if limit <= 0:
             limit = 200
-        with open(path, "r", encoding="utf-8", errors="ignore") as fh:
-            lines = fh.readlines()
-        return [line.rstrip("\n") for line in lines[-limit:]]
+        # 从文件末尾按块向前读, 凑够 limit 行即停止, 读取量只与要返回的行数有关, 与日志总大小无关
+        chunks: List[bytes] = []
+        newlines = 0
+        with open(path, "rb") as fh:
+            position = fh.seek(0, os.SEEK_END)
+            while position > 0 and newlines <= limit:
+                step = min(_TAIL_BLOCK_SIZE, position)
+                position -= step
+                fh.seek(position)
+                block = fh.read(step)
+                # \r\n 只算一次换行, 包括被块边界切开的情况
+                newlines += block.count(b"\n") + block.count(b"\r") - block.count(b"\r\n")
+                if chunks and block.endswith(b"\r") and chunks[-1].startswith(b"\n"):
+                    newlines -= 1
+                chunks.append(block)
+        data = b"".join(reversed(chunks))
+        if not data:
+            return []
+        # 与文本模式读取保持一致: \r\n 与单独的 \r 都视为换行 (进度条之类的输出依赖 \r)
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if data.endswith(b"\n"):
+            data = data[:-1]
+        # 没读到文件开头时第一段是不完整的行, 它总在最后 limit 行之外
+        lines = data.split(b"\n")[-limit:]
+        return [line.decode("utf-8", errors="ignore") for line in lines]
 
     @staticmethod
     def _load_json(path: Path) -> Any:
         if not path.exists():
             return None
-        with open(path, "r", encoding="utf-8") as fh:
-            return json.load(fh)
-
-    @staticmethod
-    def _count_file_rows(path: Path) -> int:
-        with open(path, "r", encoding="utf-8", errors="ignore") as fh:
-            return sum(1 for _ in fh)
-
-    @staticmethod
-    def _format_timestamp(value: float) -> str:
-        from datetime import datetime
-        from zoneinfo import ZoneInfo
-
-        shanghai_tz = ZoneInfo("Asia/Shanghai")
-        return datetime.fromtimestamp(value, tz=shanghai_tz).isoformat()
+        return jsonio.loads(path.read_bytes())
 
 
 __all__ = ["SchedulerUISession"]
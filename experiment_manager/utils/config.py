@@ -1,9 +1,46 @@
 """
 配置文件处理工具
 """
+import copy
 import toml
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+try:  # Python 3.11+ 自带 tomllib (同为纯 Python 实现, 但解析器写得更高效, 约比 toml 快 2.5 倍)
+    import tomllib
+except ImportError:  # pragma: no cover - Python < 3.11 时回退到 toml
+    tomllib = None
+
+# 两种解析器的格式错误类型
+_TOML_DECODE_ERRORS: Tuple[type, ...] = (toml.TomlDecodeError,)
+if tomllib is not None:
+    _TOML_DECODE_ERRORS += (tomllib.TOMLDecodeError,)
+
+
+# 已解析的 TOML 缓存, 键为 (路径, mtime_ns, 文件大小), 文件被修改后自动失效
+_TOML_CACHE: Dict[Tuple[str, int, int], Dict] = {}
+
+
+def _load_toml_cached(config_path: Path) -> Dict:
+    """读取并解析 TOML 文件, 同一版本的文件只解析一次
+
+    返回的就是缓存对象本身 (不做拷贝), 调用方不得修改它; 需要修改时先自行深拷贝
+    (ConfigManager.set 会在第一次修改前拷贝)。
+    """
+    stat = config_path.stat()
+    key = (str(config_path), stat.st_mtime_ns, stat.st_size)
+    cached = _TOML_CACHE.get(key)
+    if cached is None:
+        if tomllib is not None:
+            with open(config_path, 'rb') as f:    # tomllib 要求二进制模式
+                cached = tomllib.load(f)
+        else:
+            cached = toml.loads(config_path.read_text(encoding='utf-8'))
+        # 同一路径只保留最新版本
+        for stale_key in [k for k in _TOML_CACHE if k[0] == key[0]]:
+            del _TOML_CACHE[stale_key]
+        _TOML_CACHE[key] = cached
+    return cached
 
 
 class ConfigManager:
@@ -12,11 +49,13 @@ class ConfigManager:
     def __init__(self, config_path: Optional[Path] = None):
         self.config_path = config_path
         self.config = {}
+        self._section_cache: Dict[str, Any] = {}   # 顶级配置段的查找结果, 配置变更时清空
+        self._config_shared = False     # self.config 是否为解析缓存中的共享对象, 是则修改前需先拷贝
         if config_path and config_path.exists():
             self.load_config()
     
     def load_config(self, config_path: Optional[Path] = None) -> Dict:
-        """加载 TOML 配置文件"""
+        """加载 TOML 配置文件; 返回的字典与解析缓存共享, 请通过 set() 修改, 不要直接改动"""
         if config_path:
             self.config_path = config_path
         
@@ -24,12 +63,18 @@ class ConfigManager:
             raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
         
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = toml.load(f)
+            self.config = _load_toml_cached(self.config_path)
+            self._config_shared = True
+            self._section_cache.clear()
             return self.config
-        except toml.TomlDecodeError as e:
+        except _TOML_DECODE_ERRORS as e:
             raise ValueError(f"配置文件格式错误: {e}")
     
+    def reload(self) -> Dict:
+        """重新加载配置文件 (文件未修改时直接复用已解析的结果)"""
+        self._section_cache.clear()
+        return self.load_config()
+    
     def save_config(self, config_path: Optional[Path] = None) -> None:
         """保存配置到文件
         
@@ -73,6 +118,10 @@ class ConfigManager:
             key: 配置键，支持 'section.subsection.key' 格式
             value: 配置值
         """
+        if self._config_shared:
+            # 写时拷贝: 只在第一次修改时深拷贝, 不影响解析缓存与其他 ConfigManager
+            self.config = copy.deepcopy(self.config)
+            self._config_shared = False
         keys = key.split('.')
         config = self.config
         
@@ -83,18 +132,27 @@ class ConfigManager:
             config = config[k]
         
         config[keys[-1]] = value
+        self._section_cache.clear()
+    
+    def _get_section(self, name: str, default: Any) -> Any:
+        """获取顶级配置段, 结果缓存到下一次 load_config / reload / set"""
+        try:
+            return self._section_cache[name]
+        except KeyError:
+            value = self._section_cache[name] = self.config.get(name, default)
+            return value
     
     def get_experiments(self) -> List[Dict]:
         """获取实验配置列表"""
-        return self.get('experiments', [])
+        return self._get_section('experiments', [])
     
     def get_scheduler_config(self) -> Dict:
         """获取调度器配置"""
-        return self.get('scheduler', {})
+        return self._get_section('scheduler', {})
     
     def get_gpu_config(self) -> Dict:
         """获取 GPU 配置"""
-        return self.get('gpu', {})
+        return self._get_section('gpu', {})
     
     def validate_config(self) -> List[str]:
         """验证配置文件格式，返回错误信息列表"""
@@ -0,0 +1,82 @@
+"""
+JSON 编解码工具
+
+安装了 orjson 时使用它 (原生实现, 编解码速度是标准库的数倍)，否则回退到标准库 json。
+两种实现都输出 UTF-8 字节，非 ASCII 字符不转义，NaN / Infinity 都写成 null (保证输出是合法 JSON)。
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Union
+
+try:  # pragma: no cover - 可选依赖
+    import orjson
+except ImportError:  # pragma: no cover - 未安装或安装损坏 (如 ABI 不匹配) 时回退到标准库
+    orjson = None  # type: ignore
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类, 捕获后者即可覆盖两种实现
+JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj: Any) -> Any:
+    # 只读映射 (如 MappingProxyType) 按 dict 编码
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any, *, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 字节, indent=True 时使用 2 空格缩进"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    indent_value = 2 if indent else None
+    try:
+        text = json.dumps(data, ensure_ascii=False, indent=indent_value, allow_nan=False, default=_default)
+    except ValueError:
+        # 含 NaN / Infinity: 与 orjson 保持一致, 替换为 null 后再编码
+        text = json.dumps(_replace_non_finite(data), ensure_ascii=False, indent=indent_value, default=_default)
+    return text.encode("utf-8")
+
+
+def _replace_non_finite(data: Any) -> Any:
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, Mapping):
+        return {key: _replace_non_finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_replace_non_finite(value) for value in data]
+    return data
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """反序列化 JSON 字节或字符串"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson 只接受严格 JSON; 标准库还认 NaN / Infinity (json.dump 默认会写出它们), 交给标准库再试一次
+            pass
+    return json.loads(data)
+
+
+def dump_file(path: Path, data: Any, *, indent: bool = False) -> None:
+    """原子写入 JSON 文件: 先写同目录临时文件再 os.replace, 读者不会读到写了一半的内容"""
+    # 临时文件名带上进程和线程标识, 多个线程同时保存同一文件时互不踩踏
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(dumps(data, indent=indent))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+__all__ = ["dumps", "loads", "dump_file", "JSONDecodeError"]
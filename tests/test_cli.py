@@ -0,0 +1,29 @@
+"""
+CLI import-cost tests.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def test_cli_import_defers_heavy_dependencies() -> None:
+    code = (
+        "import sys, experiment_manager.ui.cli\n"
+        "print(sorted(m for m in ('uvicorn', 'fastapi', 'pandas') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_main_dispatches_by_command_name(monkeypatch, capsys) -> None:
+    from experiment_manager.ui import cli
+
+    calls = []
+    monkeypatch.setitem(cli._COMMAND_HANDLERS, "run", lambda args: calls.append(args.config.name))
+    cli.main(["run", "config.toml"])
+    assert calls == ["config.toml"]
+
+    cli.main([])
+    assert "usage" in capsys.readouterr().out
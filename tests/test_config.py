@@ -0,0 +1,58 @@
+"""
+ConfigManager tests.
+"""
+from __future__ import annotations
+
+import os
+import timeit
+from pathlib import Path
+from unittest.mock import patch
+
+from experiment_manager.utils import config as config_module
+from experiment_manager.utils.config import ConfigManager
+
+
+def test_sections_are_cached_until_reload(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('[scheduler]\nmax_concurrent_experiments = 1\n', encoding="utf-8")
+
+    manager = ConfigManager(config_path)
+    first = manager.get_scheduler_config()
+    assert first["max_concurrent_experiments"] == 1
+    assert manager.get_scheduler_config() is first
+
+    manager.set("scheduler.check_interval", 3)
+    assert manager.get_scheduler_config()["check_interval"] == 3
+
+    config_path.write_text('[scheduler]\nmax_concurrent_experiments = 4\n', encoding="utf-8")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    manager.reload()
+    assert manager.get_scheduler_config() == {"max_concurrent_experiments": 4}
+    assert manager.get_experiments() == []
+
+
+def test_loads_share_parsed_config_without_copying(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.toml"
+    experiments = "".join(
+        f'[[experiments]]\nname = "exp{i}"\ncommand = "echo {i}"\ntags = ["a", "b"]\n' for i in range(50)
+    )
+    config_path.write_text('[scheduler]\nmax_concurrent_experiments = 1\n' + experiments, encoding="utf-8")
+
+    first = ConfigManager(config_path)
+    with patch("experiment_manager.utils.config.copy.deepcopy") as mock_deepcopy:
+        second = ConfigManager(config_path)
+    mock_deepcopy.assert_not_called()
+    assert second.config is first.config
+
+    # set() copies on first write, so the cached config and other managers stay untouched
+    second.set("scheduler.max_concurrent_experiments", 8)
+    assert second.get("scheduler.max_concurrent_experiments") == 8
+    assert first.get("scheduler.max_concurrent_experiments") == 1
+    assert ConfigManager(config_path).get("scheduler.max_concurrent_experiments") == 1
+
+    # benchmark: a cached load must beat re-parsing the same file by a wide margin
+    cached_load = timeit.timeit(lambda: ConfigManager(config_path), number=20)
+    parse = config_module.tomllib.loads if config_module.tomllib else config_module.toml.loads
+    reparse = timeit.timeit(lambda: parse(config_path.read_text(encoding="utf-8")), number=20)
+    assert cached_load < reparse
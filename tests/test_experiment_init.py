@@ -2,6 +2,7 @@
 Test cases for Experiment.__init__ method
 """
 import json
+import threading
 import pytest
 import tempfile
 from datetime import datetime
@@ -251,6 +252,7 @@ class TestExperimentInit:
         (log_dir / "run_0003.log").touch()
         (log_dir / "run_0005.log").touch()
         (log_dir / "invalid_name.log").touch()  # Should be ignored
+        (log_dir / "run_notes.log").touch()  # Unparsable run number, ignored
         
         exp = Experiment(
             name="test_exp",
@@ -261,6 +263,37 @@ class TestExperimentInit:
         # Should find next available number after 0005
         assert exp.current_run_id == "run_0006"
 
+    def test_output_drained_tracks_background_output_thread(self, temp_base_dir):
+        exp = Experiment(
+            name="drain_exp",
+            command="python train.py",
+            base_dir=temp_base_dir,
+        )
+        assert exp.output_drained()
+
+        release = threading.Event()
+        exp._output_thread = threading.Thread(target=release.wait)
+        exp._output_thread.start()
+        assert not exp.output_drained()
+        release.set()
+        exp._output_thread.join()
+        assert exp.output_drained()
+
+    def test_start_new_run_and_get_all_runs(self, temp_base_dir):
+        exp = Experiment(
+            name="runs_exp",
+            command="python train.py",
+            base_dir=temp_base_dir,
+        )
+        log_dir = exp.work_dir / "terminal_logs"
+        (log_dir / "run_0004.log").touch()
+        (log_dir / "notes.txt").touch()
+
+        assert exp.start_new_run() == "run_0005"
+        assert "run_0004" in exp.get_all_runs()
+        assert "notes" not in exp.get_all_runs()
+        assert exp.get_all_runs() == sorted(exp.get_all_runs())
+
     def test_init_creates_log_entry_for_new_run(self, temp_base_dir):
         """Test that initialization creates initial log entries"""
         exp = Experiment(
@@ -297,6 +330,24 @@ class TestExperimentInit:
         offset = parsed.utcoffset()
         assert offset is not None
         assert offset.total_seconds() == 8 * 3600
+        assert len(ts.split("T")[1].split("+")[0]) == len("00:00:00.000000")
+
+    def test_load_from_dir_accepts_z_suffix(self, temp_base_dir):
+        work_dir = temp_base_dir / "z_exp" / "2023-01-01__12-00-00"
+        work_dir.mkdir(parents=True)
+        metadata = {
+            "name": "z_exp",
+            "command": "python train.py",
+            "timestamp": "2023-01-01T04:00:00Z",
+            "tags": [],
+            "status": ExperimentStatus.FINISHED.value,
+        }
+        with open(work_dir / "metadata.json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+
+        exp = Experiment.load_from_dir(work_dir)
+        assert exp.timestamp.utcoffset().total_seconds() == 0
+        assert exp.timestamp.hour == 4
 
     def test_init_parses_lark_url(self, temp_base_dir):
         url = (
@@ -0,0 +1,62 @@
+"""
+JSON helper tests.
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from experiment_manager.utils import jsonio
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_keeps_unicode_with_and_without_orjson(monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(jsonio, "orjson", None)
+    elif jsonio.orjson is None:
+        pytest.skip("orjson not installed")
+
+    data = {"name": "实验", "values": [1, 2.5, None, True]}
+    encoded = jsonio.dumps(data, indent=True)
+
+    assert isinstance(encoded, bytes)
+    assert "实验".encode("utf-8") in encoded
+    assert b"\n  " in encoded
+    assert jsonio.loads(encoded) == data
+    with pytest.raises(jsonio.JSONDecodeError):
+        jsonio.loads(b"{broken")
+
+
+def test_loads_accepts_nan_written_by_stdlib() -> None:
+    data = jsonio.loads(b'{"loss": NaN, "best": Infinity}')
+
+    assert data["loss"] != data["loss"]
+    assert data["best"] == float("inf")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_writes_non_finite_floats_as_null(monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(jsonio, "orjson", None)
+    elif jsonio.orjson is None:
+        pytest.skip("orjson not installed")
+
+    encoded = jsonio.dumps({"rows": [{"loss": float("nan"), "best": float("-inf")}], "step": 1.5})
+
+    assert json.loads(encoded) == {"rows": [{"loss": None, "best": None}], "step": 1.5}
+
+
+def test_dump_file_replaces_atomically_without_leftovers(tmp_path) -> None:
+    target = tmp_path / "metadata.json"
+    target.write_bytes(b'{"old": true}')
+
+    jsonio.dump_file(target, {"name": "实验"}, indent=True)
+
+    assert jsonio.loads(target.read_bytes()) == {"name": "实验"}
+    assert [p.name for p in tmp_path.iterdir()] == ["metadata.json"]
+
+    with pytest.raises(TypeError):
+        jsonio.dump_file(target, {"bad": object()})
+    assert jsonio.loads(target.read_bytes()) == {"name": "实验"}
+    assert [p.name for p in tmp_path.iterdir()] == ["metadata.json"]
@@ -3,8 +3,16 @@ Scheduler-focused tests.
 """
 from __future__ import annotations
 
+import copy
+import dataclasses
+import os
+import pickle
+import subprocess
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from typing import Callable, Dict, Iterable, Optional
 from unittest.mock import Mock, patch
 
@@ -12,7 +20,16 @@ import pytest
 import toml
 
 from experiment_manager.core.status import ExperimentStatus
-from experiment_manager.scheduler.scheduler import ExperimentScheduler, ScheduledExperiment
+from experiment_manager.scheduler.pending_queue import PendingQueue, TieredPendingQueue
+from experiment_manager.scheduler.scheduler import (
+    ActiveSlot,
+    ExperimentScheduler,
+    FinishedRecord,
+    LaunchedRuntime,
+    PendingTask,
+    ScheduledExperiment,
+)
+from experiment_manager.scheduler.state_store import SchedulerCommand
 
 
 @pytest.fixture
@@ -62,9 +79,9 @@ def test_prepare_pending_queue_orders_by_priority_and_repeats(
     scheduler = ExperimentScheduler(config_path)
     scheduler._prepare_pending_queue()
 
-    names = [item["config"].name for item in scheduler._pending]
+    names = [item.config.name for item in scheduler._pending]
     assert names == ["high", "high", "medium", "low"]
-    assert all(task["attempt"] == 0 for task in scheduler._pending)
+    assert all(task.attempt == 0 for task in scheduler._pending)
 
 
 def test_try_launch_new_tasks_respects_concurrency(
@@ -82,9 +99,8 @@ def test_try_launch_new_tasks_respects_concurrency(
     scheduler = ExperimentScheduler(config_path)
     scheduler._prepare_pending_queue()
 
-    def fake_launch(cfg: ScheduledExperiment, attempt: int) -> Dict[str, object]:
-        process = Mock()
-        return {"instance": Mock(), "process": process}
+    def fake_launch(cfg: ScheduledExperiment, attempt: int) -> LaunchedRuntime:
+        return LaunchedRuntime(Mock(), Mock())
 
     with patch.object(scheduler, "_launch_experiment", side_effect=fake_launch) as mock_launch:
         scheduler._try_launch_new_tasks()
@@ -92,7 +108,7 @@ def test_try_launch_new_tasks_respects_concurrency(
     assert mock_launch.call_count == 2
     assert len(scheduler._active) == 2
     assert len(scheduler._pending) == 1
-    assert all(slot["attempt"] == 1 for slot in scheduler._active)
+    assert all(slot.attempt == 1 for slot in scheduler._active)
 
 
 def test_harvest_finished_tasks_moves_and_requeues(
@@ -119,31 +135,33 @@ def test_harvest_finished_tasks_moves_and_requeues(
     failure_instance = Mock()
     failure_instance.status = ExperimentStatus.ERROR
 
-    scheduler._pending = []
+    scheduler._pending = PendingQueue()
     scheduler._active = [
-        {
-            "config": success_cfg,
-            "experiment": {"instance": success_instance, "process": success_process},
-            "attempt": 1,
-            "started_at": datetime.now(),
-        },
-        {
-            "config": failure_cfg,
-            "experiment": {"instance": failure_instance, "process": failure_process},
-            "attempt": 1,
-            "started_at": datetime.now(),
-        },
+        ActiveSlot(
+            config=success_cfg,
+            instance=success_instance,
+            process=success_process,
+            attempt=1,
+            started_ns=time.monotonic_ns(),
+        ),
+        ActiveSlot(
+            config=failure_cfg,
+            instance=failure_instance,
+            process=failure_process,
+            attempt=1,
+            started_ns=time.monotonic_ns(),
+        ),
     ]
 
     scheduler._harvest_finished_tasks()
 
     assert scheduler._active == []
-    status_by_name = {record["config"].name: record["status"] for record in scheduler._finished}
+    status_by_name = {record.config.name: record.status for record in scheduler._finished.values()}
     assert status_by_name["success"] == "success"
     assert status_by_name["failure"] == "failed"
     assert scheduler._pending
-    assert scheduler._pending[0]["config"].name == "failure"
-    assert scheduler._pending[0]["attempt"] == 1
+    assert scheduler._pending.peek().config.name == "failure"
+    assert scheduler._pending.peek().attempt == 1
 
 
 def test_run_all_executes_until_complete(
@@ -166,7 +184,7 @@ def test_run_all_executes_until_complete(
     experiment_instance = Mock()
     experiment_instance.status = ExperimentStatus.FINISHED
 
-    runtime = {"instance": experiment_instance, "process": process}
+    runtime = LaunchedRuntime(experiment_instance, process)
 
     with patch("experiment_manager.scheduler.scheduler.time.sleep", return_value=None), patch.object(
         scheduler, "_launch_experiment", return_value=runtime
@@ -174,9 +192,9 @@ def test_run_all_executes_until_complete(
         scheduler.run_all()
 
     assert mock_launch.call_count == 1
-    assert scheduler._pending == []
+    assert not scheduler._pending
     assert scheduler._active == []
-    assert scheduler._finished and scheduler._finished[0]["status"] == "success"
+    assert [record.status for record in scheduler._finished.values()] == ["success"]
     assert any("调度完成" in record.args[0] for record in mock_print.call_args_list if record.args)
 
 
@@ -223,4 +241,545 @@ def test_relative_experiment_cwd_uses_invocation_cwd(
 
     assert mock_experiment.call_args is not None
     kwargs = mock_experiment.call_args.kwargs
-    assert kwargs["cwd"] == (run_cwd / "nested").resolve()
\ No newline at end of file
+    assert kwargs["cwd"] == (run_cwd / "nested").resolve()
+
+
+def test_print_summary_groups_attempts_by_config(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+
+    direct = ScheduledExperiment(name="direct", command="echo direct")
+    retried = ScheduledExperiment(name="retried", command="echo retried")
+    broken = ScheduledExperiment(name="broken", command="echo broken")
+    records = [
+        FinishedRecord(config=direct, status="success", attempt=1, return_code=0, id="t1"),
+        FinishedRecord(config=retried, status="failed", attempt=1, return_code=1, id="t2"),
+        FinishedRecord(config=retried, status="success", attempt=2, return_code=0, id="t3"),
+        FinishedRecord(config=broken, status="failed", attempt=1, return_code=2, id="t4"),
+    ]
+    for record in records:
+        scheduler._add_finished(record)
+
+    with patch("builtins.print") as mock_print:
+        scheduler._print_summary()
+
+    lines = [record.args[0] for record in mock_print.call_args_list if record.args]
+    assert "直接成功 1 个, 重试后成功 1 个, 失败 1 个" in lines[0]
+    assert any("🟡 retried" in line for line in lines)
+    assert any("🔴 broken" in line for line in lines)
+
+
+def test_pending_queue_requeue_respects_priority() -> None:
+    high = ScheduledExperiment(name="high", command="echo high", priority=5)
+    low = ScheduledExperiment(name="low", command="echo low", priority=1)
+    queue = PendingQueue(
+        [
+            PendingTask(config=low, order=0, attempt=0, id="low-1"),
+            PendingTask(config=high, order=1, attempt=0, id="high-1"),
+        ]
+    )
+
+    assert queue.pop().config.name == "high"
+    queue.push(PendingTask(config=high, order=1, attempt=1, id="high-2"))
+    queue.push(PendingTask(config=low, order=0, attempt=1, id="low-2"))
+
+    assert [item.id for item in queue] == ["high-2", "low-1", "low-2"]
+    assert queue.remove("low-1")
+    assert not queue.remove("missing")
+    assert [queue.pop().id for _ in range(len(queue))] == ["high-2", "low-2"]
+
+
+def test_retry_push_jumps_ahead_of_same_priority_only() -> None:
+    high = ScheduledExperiment(name="high", command="echo high", priority=5)
+    mid = ScheduledExperiment(name="mid", command="echo mid", priority=3)
+    queue = PendingQueue(
+        [
+            PendingTask(config=high, order=0, attempt=0, id="high-1"),
+            PendingTask(config=mid, order=1, attempt=0, id="mid-1"),
+            PendingTask(config=mid, order=2, attempt=0, id="mid-2"),
+        ]
+    )
+
+    queue.push(PendingTask(config=mid, order=1, attempt=1, id="mid-retry"), front=True)
+
+    assert [item.id for item in queue] == ["high-1", "mid-retry", "mid-1", "mid-2"]
+
+
+def test_harvest_uses_returncode_reaped_by_output_thread(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+
+    process = Mock()
+    process.returncode = 0
+    process.poll.side_effect = AssertionError("poll() should not be called once returncode is known")
+    instance = Mock()
+    instance.status = ExperimentStatus.FINISHED
+
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="done", command="echo done"),
+            instance=instance,
+            process=process,
+            attempt=1,
+        )
+    ]
+
+    scheduler._harvest_finished_tasks()
+
+    assert scheduler._active == []
+    assert [record.status for record in scheduler._finished.values()] == ["success"]
+    process.poll.assert_not_called()
+
+
+def test_sync_state_renders_monotonic_start_as_local_timestamp(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+
+    process = Mock()
+    process.returncode = None
+    instance = Mock()
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="live", command="sleep 1"),
+            instance=instance,
+            process=process,
+            attempt=1,
+            started_ns=time.monotonic_ns(),
+            id="task-live",
+        )
+    ]
+
+    before = time.time()
+    scheduler._sync_state()
+
+    started_at = scheduler.state_store.load_state()["running"][0]["started_at"]
+    assert started_at.endswith("+08:00")
+    assert abs(datetime.fromisoformat(started_at).timestamp() - before) < 5
+
+
+def test_invalid_experiments_are_reported_together(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {"name": "ok", "command": "echo ok"},
+            {"name": "no-command"},
+            {"name": "bad-gpu", "command": "echo gpu", "gpu_ids": "0,x"},
+        ]
+    )
+
+    with pytest.raises(ValueError) as exc_info:
+        ExperimentScheduler(config_path)
+
+    message = str(exc_info.value)
+    assert "第 2 个实验配置" in message
+    assert "第 3 个实验配置" in message
+    assert "第 1 个实验配置" not in message
+    assert exc_info.value.__cause__ is not None
+
+
+def test_lark_config_is_merged_and_expanded_at_load_time(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {"name": "tracked", "command": "echo tracked", "lark_config": {"app_id": "cli_exp"}},
+            {"name": "plain", "command": "echo plain"},
+        ],
+        scheduler_overrides={
+            "lark_url": "https://example.feishu.cn/base/appABCDE12345?table=tblABCDE12345&view=vewABCDE12345",
+            "lark_config": {"app_id": "cli_scheduler", "app_secret": "secret"},
+        },
+    )
+    scheduler = ExperimentScheduler(config_path)
+
+    tracked, plain = scheduler._scheduled
+    assert tracked.resolved_lark_config["app_id"] == "cli_exp"
+    assert tracked.resolved_lark_config["app_secret"] == "secret"
+    assert tracked.resolved_lark_config["app_token"] == "appABCDE12345"
+    assert tracked.resolved_lark_config["table_id"] == "tblABCDE12345"
+    assert plain.resolved_lark_config["app_id"] == "cli_scheduler"
+
+
+def test_pending_queue_remove_skips_tombstoned_entries() -> None:
+    cfg = ScheduledExperiment(name="exp", command="echo exp")
+    queue = PendingQueue(PendingTask(config=cfg, order=i, attempt=0, id=f"t{i}") for i in range(3))
+
+    assert queue.remove("t0")
+    assert not queue.remove("t0")
+    assert len(queue) == 2
+    assert queue.peek().id == "t1"
+    assert [item.id for item in queue] == ["t1", "t2"]
+
+    assert queue.remove("t1") and queue.remove("t2")
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_pending_queue_compacts_tombstones_and_caches_snapshot() -> None:
+    cfg = ScheduledExperiment(name="exp", command="echo exp")
+    queue = PendingQueue(PendingTask(config=cfg, order=i, attempt=0, id=f"t{i}") for i in range(4))
+
+    for i in range(4, 1000):
+        queue.push(PendingTask(config=cfg, order=i, attempt=0, id=f"t{i}"))
+        assert queue.remove(f"t{i - 4}")
+    assert len(queue) == 4
+    assert len(queue._heap) <= 2 * len(queue)
+
+    with patch("experiment_manager.scheduler.pending_queue.sorted", create=True, side_effect=sorted) as mock_sorted:
+        assert [item.id for item in queue] == ["t996", "t997", "t998", "t999"]
+        assert [item.id for item in queue] == ["t996", "t997", "t998", "t999"]
+        assert mock_sorted.call_count == 1
+        queue.pop()
+        assert [item.id for item in queue] == ["t997", "t998", "t999"]
+        assert mock_sorted.call_count == 2
+
+
+def test_starvation_limit_lets_low_priority_tasks_through(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {"name": "high", "command": "echo high", "priority": 10, "repeats": 4},
+            {"name": "low", "command": "echo low", "priority": 1},
+        ],
+        scheduler_overrides={"starvation_limit": 2},
+    )
+    scheduler = ExperimentScheduler(config_path)
+    scheduler._prepare_pending_queue()
+
+    assert isinstance(scheduler._pending, TieredPendingQueue)
+    names = [scheduler._pending.pop().config.name for _ in range(len(scheduler._pending))]
+    assert names == ["high", "high", "low", "high", "high"]
+
+
+def test_tiered_queue_iterates_in_dispatch_order() -> None:
+    high = ScheduledExperiment(name="high", command="echo high", priority=10)
+    low = ScheduledExperiment(name="low", command="echo low", priority=1)
+    tasks = [PendingTask(config=high, order=i, attempt=0, id=f"h{i}") for i in range(5)]
+    tasks += [PendingTask(config=low, order=5 + i, attempt=0, id=f"l{i}") for i in range(2)]
+    queue = TieredPendingQueue(tasks, boundary=10, starvation_limit=2)
+    queue.pop()  # streak carried into the snapshot
+
+    snapshot = [item.id for item in queue]
+    assert snapshot == ["h1", "l0", "h2", "h3", "l1", "h4"]
+    assert [queue.pop().id for _ in range(len(queue))] == snapshot
+
+
+def test_wait_interval_resets_on_progress_and_backs_off_when_idle(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([], scheduler_overrides={"check_interval": 2.0})
+    scheduler = ExperimentScheduler(config_path)
+
+    scheduler._adjust_interval(progress=1)
+    assert scheduler._current_interval == pytest.approx(0.05)
+
+    scheduler._adjust_interval(progress=0)
+    assert scheduler._current_interval == pytest.approx(0.075)
+
+    for _ in range(50):
+        scheduler._adjust_interval(progress=0)
+    assert scheduler._current_interval == pytest.approx(2.0)
+
+
+def test_sync_state_skips_write_when_nothing_changed(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([{"name": "exp", "command": "echo run"}])
+    scheduler = ExperimentScheduler(config_path)
+
+    with patch.object(scheduler.state_store, "write_state") as mock_write:
+        scheduler._prepare_pending_queue()
+        assert mock_write.call_count == 1
+
+        # idle passes change nothing and must not rewrite the state file
+        scheduler._sync_state()
+        assert scheduler._consume_commands() == 0
+        assert scheduler._harvest_finished_tasks() == 0
+        assert mock_write.call_count == 1
+
+        # a real queue mutation (remove_pending from the UI) is written once
+        task_id = scheduler._pending.peek().id
+        scheduler.state_store.enqueue_command(SchedulerCommand(action="remove_pending", payload={"id": task_id}))
+        assert scheduler._consume_commands() == 1
+        assert not scheduler._pending
+        assert mock_write.call_count == 2
+        scheduler._sync_state()
+        assert scheduler._try_launch_new_tasks() == 0
+        assert mock_write.call_count == 2
+
+        # harvesting a finished run marks the state dirty and writes it
+        process = Mock()
+        process.returncode = 0
+        instance = Mock()
+        instance.status = ExperimentStatus.FINISHED
+        scheduler._active = [
+            ActiveSlot(config=scheduler._scheduled[0], instance=instance, process=process, attempt=1, id="run")
+        ]
+        assert scheduler._harvest_finished_tasks() == 1
+        assert mock_write.call_count == 3
+        scheduler._sync_state()
+        assert mock_write.call_count == 3
+
+
+def test_finished_records_are_removed_and_retried_by_id(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+    cfg = ScheduledExperiment(name="exp", command="echo exp")
+    records = [
+        FinishedRecord(config=cfg, status="success", attempt=1, id="ok"),
+        FinishedRecord(config=cfg, status="failed", attempt=1, id="bad"),
+        FinishedRecord(config=cfg, status="terminated", attempt=1, id="killed"),
+    ]
+    for record in records:
+        scheduler._add_finished(record)
+
+    with patch("builtins.print"):
+        scheduler._handle_remove_error({"id": "ok"})  # success records are not errors
+        scheduler._handle_remove_error({"id": "bad"})
+        scheduler._handle_retry_error({"id": "killed"})
+        scheduler._handle_remove_finished({"id": "ok"})
+
+    assert scheduler._finished == {}
+    assert scheduler._finished_by_uid == {}
+    assert scheduler._pending.peek().id == "killed"
+
+
+def test_batched_sync_writes_state_once(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [{"name": "a", "command": "echo a"}, {"name": "b", "command": "echo b"}]
+    )
+    scheduler = ExperimentScheduler(config_path)
+    scheduler._prepare_pending_queue()
+
+    with patch.object(scheduler.state_store, "write_state") as mock_write, patch.object(
+        scheduler, "_launch_experiment", return_value=LaunchedRuntime(Mock(), Mock())
+    ), patch("builtins.print"):
+        with scheduler._batched_sync():
+            scheduler._try_launch_new_tasks()
+            scheduler._handle_remove_pending({"id": "missing"})
+            scheduler._dirty = True
+            scheduler._sync_state()
+            assert mock_write.call_count == 0
+        assert mock_write.call_count == 1
+
+
+def test_repeats_share_immutable_config_containers(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {
+                "name": "rep",
+                "command": "echo rep",
+                "tags": ["a"],
+                "gpu_ids": [0, 1],
+                "environment": {"SEED": 1},
+                "repeats": 3,
+            }
+        ]
+    )
+    scheduler = ExperimentScheduler(config_path)
+
+    first, *others = scheduler._scheduled
+    assert len(others) == 2
+    assert all(cfg.tags is first.tags and cfg.environment is first.environment for cfg in others)
+    assert len({cfg.uid for cfg in scheduler._scheduled}) == 3
+    assert first.payload["tags"] == ["a"] and first.payload["gpu_ids"] == [0, 1]
+    assert first.env_strings == {"SEED": "1"}
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.priority = 5  # type: ignore[misc]
+
+
+def test_scheduled_experiment_is_hashable_and_copyable() -> None:
+    env = {"SEED": 1}
+    cfg = ScheduledExperiment(name="exp", command="echo exp", environment=env)
+    twin = ScheduledExperiment(name="exp", command="echo exp", environment=env)
+    env["SEED"] = 2
+
+    assert cfg.environment == {"SEED": 1}
+    assert cfg != twin and len({cfg, twin}) == 2
+    assert cfg.payload["environment"] == {"SEED": 1}
+
+    for clone in (copy.deepcopy(cfg), pickle.loads(pickle.dumps(cfg))):
+        assert isinstance(clone.environment, MappingProxyType)
+        assert clone.environment == {"SEED": 1}
+        assert clone.uid == cfg.uid
+        assert clone.env_strings == {"SEED": "1"}
+        assert clone.payload == cfg.payload
+
+
+def test_delayed_task_holds_slot_without_blocking(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {"name": "slow", "command": "echo slow", "priority": 2, "delay_seconds": 0.05},
+            {"name": "now", "command": "echo now", "priority": 1},
+        ],
+        {"max_concurrent_experiments": 1},
+    )
+    scheduler = ExperimentScheduler(config_path)
+    scheduler._prepare_pending_queue()
+
+    with patch.object(
+        scheduler, "_launch_experiment", return_value=LaunchedRuntime(Mock(), Mock())
+    ) as mock_launch, patch("builtins.print"):
+        assert scheduler._try_launch_new_tasks() == 0
+        assert len(scheduler._delayed) == 1 and len(scheduler._pending) == 1
+        assert scheduler._try_launch_new_tasks() == 0
+
+        time.sleep(0.06)
+        assert scheduler._try_launch_new_tasks() == 1
+        assert mock_launch.call_args.args[0].name == "slow"
+        assert not scheduler._delayed and len(scheduler._pending) == 1
+
+
+def test_now_iso_is_fresh_within_a_batch(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([{"name": "a", "command": "echo a"}])
+    scheduler = ExperimentScheduler(config_path)
+
+    with patch("experiment_manager.scheduler.scheduler.datetime") as mock_datetime:
+        mock_datetime.now.return_value.isoformat.side_effect = ["t1", "t2", "t3"]
+        with scheduler._batched_sync():
+            # a batch can span slow work (terminations), so each event gets its own time
+            assert scheduler._now_iso() == "t1"
+            assert scheduler._now_iso() == "t2"
+        assert scheduler._now_iso() == "t3"
+    assert mock_datetime.now.call_count == 3
+
+
+def test_shared_experiment_paths_are_resolved_once(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder(
+        [
+            {"name": "a", "command": "echo a", "cwd": "./work"},
+            {"name": "b", "command": "echo b", "cwd": "./work"},
+        ]
+    )
+    with patch.object(Path, "resolve", autospec=True, side_effect=lambda self, strict=False: self) as mock_resolve:
+        scheduler = ExperimentScheduler(config_path)
+
+    first, second = scheduler._scheduled
+    assert first.resolved_cwd is second.resolved_cwd
+    resolved_args = [call.args[0] for call in mock_resolve.call_args_list]
+    assert sum(1 for path in resolved_args if path.name == "work") == 1
+
+
+def test_harvest_keeps_wakeup_flag_until_exited_child_is_collected(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)  # wait for exit without reaping
+    instance = Mock()
+    instance.status = ExperimentStatus.FINISHED
+    instance.output_drained.return_value = True
+    scheduler._pending = PendingQueue()
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="exp", command="true"),
+            instance=instance,
+            process=process,
+            attempt=1,
+            started_ns=time.monotonic_ns(),
+        )
+    ]
+    scheduler._wakeup_fds = (-1, -1)  # pretend the SIGCHLD fast path is active
+    scheduler._last_full_scan = time.monotonic()
+    scheduler._child_exit_pending = True
+
+    try:
+        # poll() reports None while another thread is reaping the child
+        with patch.object(process, "poll", return_value=None):
+            assert scheduler._harvest_finished_tasks() == 0
+        assert scheduler._child_exit_pending
+        assert scheduler._harvest_finished_tasks() == 1
+        assert not scheduler._child_exit_pending
+    finally:
+        scheduler._wakeup_fds = None
+
+
+def test_harvest_clears_wakeup_flag_when_children_are_confirmed_running(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="exp", command="sleep"),
+            instance=Mock(),
+            process=process,
+            attempt=1,
+        )
+    ]
+    scheduler._wakeup_fds = (-1, -1)  # pretend the SIGCHLD fast path is active
+    scheduler._child_exit_pending = True
+
+    try:
+        assert scheduler._harvest_finished_tasks() == 0
+        assert not scheduler._child_exit_pending
+    finally:
+        scheduler._wakeup_fds = None
+        process.kill()
+        process.wait()
+
+
+def test_harvest_defers_slot_while_output_is_draining(
+    scheduler_config_builder: Callable[[Iterable[Dict[str, object]], Optional[Dict[str, object]]], Path]
+) -> None:
+    config_path = scheduler_config_builder([])
+    scheduler = ExperimentScheduler(config_path)
+    process = Mock()
+    process.returncode = 0
+    instance = Mock()
+    instance.status = ExperimentStatus.FINISHED
+    instance.output_drained.return_value = False
+    scheduler._pending = PendingQueue()
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="exp", command="echo exp"),
+            instance=instance,
+            process=process,
+            attempt=1,
+        )
+    ]
+
+    started = time.monotonic()
+    assert scheduler._harvest_finished_tasks() == 0
+    assert time.monotonic() - started < 0.5  # never blocks on the output thread
+    assert scheduler._active[0].exited_ns is not None
+
+    instance.output_drained.return_value = True
+    assert scheduler._harvest_finished_tasks() == 1
+    assert [record.status for record in scheduler._finished.values()] == ["success"]
+
+    # a slot whose output never drains is harvested once the drain timeout has passed
+    scheduler._active = [
+        ActiveSlot(
+            config=ScheduledExperiment(name="stuck", command="echo stuck"),
+            instance=instance,
+            process=process,
+            attempt=1,
+            exited_ns=time.monotonic_ns() - 2_000_000_000,
+        )
+    ]
+    instance.output_drained.return_value = False
+    assert scheduler._harvest_finished_tasks() == 1
@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
 
-from experiment_manager.scheduler.state_store import SchedulerStateStore
+from experiment_manager.scheduler.state_store import SchedulerCommand, SchedulerStateStore
 
 
 def test_state_store_uses_shanghai_timezone(tmp_path: Path) -> None:
@@ -17,3 +17,12 @@ def test_state_store_uses_shanghai_timezone(tmp_path: Path) -> None:
     offset = parsed.utcoffset()
     assert offset is not None
     assert offset.total_seconds() == 8 * 3600
+
+
+def test_scheduler_command_id_and_created_at_share_one_timestamp() -> None:
+    command = SchedulerCommand(action="remove_pending")
+
+    created = datetime.fromisoformat(command.created_at)
+    assert created.utcoffset() is not None and created.utcoffset().total_seconds() == 8 * 3600
+    assert command.id == created.strftime("%Y%m%d%H%M%S%f")
+    assert SchedulerCommand(action="noop", id="fixed").id == "fixed"
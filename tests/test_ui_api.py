@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
 from fastapi.testclient import TestClient
@@ -72,11 +73,17 @@ def test_api_endpoints(tmp_path: Path) -> None:
     app = create_app(session)
     client = TestClient(app)
 
+    # index page
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+
     # state endpoint
     response = client.get("/api/state")
     assert response.status_code == 200
     state = response.json()
     assert state["running"][0]["id"] == "task-0001"
+    assert response.headers["content-type"] == "application/json"
 
     # task details
     response = client.get("/api/tasks/task-0001")
@@ -98,6 +105,15 @@ def test_api_endpoints(tmp_path: Path) -> None:
     assert metric_payload["type"] == "csv"
     assert metric_payload["columns"] == ["step", "loss"]
 
+    # metric rows streamed as JSON Lines
+    response = client.get("/api/tasks/task-0001/metrics/result.csv", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"type": "csv", "columns": ["step", "loss"]}, ["1", "0.5"], ["2", "0.4"]]
+    response = client.get("/api/tasks/task-0001/metrics/missing.csv", params={"format": "ndjson"})
+    assert response.status_code == 404
+
     # command enqueue
     response = client.post("/api/commands", json={"action": "remove_pending", "payload": {"id": "task-x"}})
     assert response.status_code == 200
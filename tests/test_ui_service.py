@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
+import threading
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from experiment_manager.ui.service import SchedulerUISession
+from experiment_manager.scheduler.state_store import SchedulerCommand, SchedulerStateStore
+from experiment_manager.ui.service import SchedulerUISession, _format_mtime_ns
+from experiment_manager.utils import jsonio
 
 
 @pytest.fixture
@@ -64,6 +70,24 @@ def test_get_task_details_reads_metadata(session: SchedulerUISession, tmp_path:
     assert details["metrics"][0]["name"] == "result.csv"
 
 
+def test_metric_preview_counts_rows_in_one_pass_and_caches(
+    monkeypatch: pytest.MonkeyPatch, session: SchedulerUISession
+) -> None:
+    monkeypatch.setattr("experiment_manager.ui.service._METRIC_BLOCK_SIZE", 16)
+    metrics_dir = session.base_dir / "demo" / "metrics"
+    metrics_dir.mkdir(parents=True)
+    metrics_path = metrics_dir / "loss.csv"
+    metrics_path.write_text("step,loss\n" + "\n".join(f"{idx},0.{idx}" for idx in range(9)), encoding="utf-8")
+
+    (preview,) = session._list_metric_previews(metrics_dir.parent)
+    assert preview.rows == 9
+    assert preview.columns == ["step", "loss"]
+    assert [row["step"] for row in preview.sample] == ["0", "1", "2", "3", "4"]
+
+    with patch("builtins.open", side_effect=AssertionError("cached preview should not reopen the file")):
+        assert session._list_metric_previews(metrics_dir.parent)[0].rows == 9
+
+
 def test_read_log_returns_tail(session: SchedulerUISession, tmp_path: Path) -> None:
     work_dir = session.base_dir / "demo_2025-09-27__12-00-00"
     (work_dir / "terminal_logs").mkdir(parents=True, exist_ok=True)
@@ -80,6 +104,24 @@ def test_read_log_returns_tail(session: SchedulerUISession, tmp_path: Path) -> N
     assert result["lines"][-1] == "line 49"
 
 
+def test_tail_file_reads_backwards_across_blocks(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("experiment_manager.ui.service._TAIL_BLOCK_SIZE", 8)
+    log_path = tmp_path / "run.log"
+    log_path.write_bytes("首行\r\nline 1\rline 2\nline 3\r\n".encode("utf-8"))
+
+    assert SchedulerUISession._tail_file(log_path, 2) == ["line 2", "line 3"]
+    assert SchedulerUISession._tail_file(log_path, 10) == ["首行", "line 1", "line 2", "line 3"]
+
+
+
+def test_split_log_chunk_keeps_truncated_character_for_next_read() -> None:
+    data = "step 1\r\nloss 中".encode("utf-8")
+
+    lines, carry = SchedulerUISession._split_log_chunk(data[:-1])
+    assert lines == ["step 1", "loss "]
+    lines, carry = SchedulerUISession._split_log_chunk(carry + data[-1:] + b"\n")
+    assert lines == ["中"] and carry == b""
+
 @pytest.mark.asyncio
 async def test_stream_log_sends_updates(session: SchedulerUISession, tmp_path: Path) -> None:
     work_dir = session.base_dir / "demo_2025-09-27__12-00-00"
@@ -116,3 +158,190 @@ def test_send_command_enqueues(session: SchedulerUISession) -> None:
     assert result["action"] == "remove_pending"
     commands = session.state_store.consume_commands()
     assert commands and commands[0]["action"] == "remove_pending"
+
+
+def test_has_pending_commands_sees_commands_from_another_store(session: SchedulerUISession) -> None:
+    scheduler_store = SchedulerStateStore(session.state_store.base_dir)
+    assert not scheduler_store.has_pending_commands()
+
+    session.send_command("remove_pending", {"id": "task-0001"})
+    assert scheduler_store.has_pending_commands()
+    assert len(scheduler_store.consume_commands()) == 1
+    assert not scheduler_store.has_pending_commands()
+    assert not session.state_store.has_pending_commands()
+
+
+def test_load_state_reuses_parse_until_file_changes(session: SchedulerUISession) -> None:
+    store = session.state_store
+    first = store.load_state()
+    assert store.load_state() is first
+
+    store.write_state(pending=[{"id": "task-0001"}], running=[], finished=[], errors=[])
+    refreshed = store.load_state()
+    assert refreshed is not first
+    assert refreshed["pending"][0]["id"] == "task-0001"
+
+
+def test_load_state_is_read_only(session: SchedulerUISession) -> None:
+    store = session.state_store
+    store.write_state(pending=[{"id": "task-0001", "tags": ["a"]}], running=[], finished=[], errors=[])
+    state = store.load_state()
+
+    with pytest.raises(TypeError):
+        state["pending"] = []  # type: ignore[index]
+    with pytest.raises(TypeError):
+        state["pending"][0]["id"] = "other"  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        state["pending"][0]["tags"].append("b")  # type: ignore[union-attr]
+    assert json.loads(jsonio.dumps(state))["pending"] == [{"id": "task-0001", "tags": ["a"]}]
+
+
+def test_commands_are_appended_as_lines_and_consumed_in_order(session: SchedulerUISession) -> None:
+    store = session.state_store
+    session.send_command("remove_pending", {"id": "task-0001"})
+    session.send_command("retry_error", {"id": "task-0002"})
+    with open(store.command_path, "ab") as fh:
+        fh.write(b'{"action": "trunc\n')
+
+    lines = store.command_path.read_bytes().splitlines()
+    assert len(lines) == 3 and json.loads(lines[0])["action"] == "remove_pending"
+
+    commands = store.consume_commands()
+    assert [cmd["action"] for cmd in commands] == ["remove_pending", "retry_error"]
+    assert not store.has_pending_commands()
+    assert store.consume_commands() == []
+
+
+def test_concurrent_enqueue_and_consume_lose_no_commands(session: SchedulerUISession) -> None:
+    scheduler_store = SchedulerStateStore(session.base_dir)
+    total = 200
+
+    def producer() -> None:
+        ui_store = SchedulerStateStore(session.base_dir)
+        for idx in range(total):
+            ui_store.enqueue_command(SchedulerCommand(action="noop", payload={"n": idx}))
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    received = []
+    while thread.is_alive() or scheduler_store.has_pending_commands():
+        received.extend(cmd["payload"]["n"] for cmd in scheduler_store.consume_commands())
+    thread.join()
+
+    assert received == list(range(total))
+
+
+def test_partial_command_line_is_discarded_by_consume(session: SchedulerUISession) -> None:
+    store = session.state_store
+    session.send_command("remove_pending", {"id": "task-0001"})
+    with open(store.command_path, "ab") as fh:
+        fh.write(b'{"action": "retry_error"}')  # writer died before the trailing newline
+
+    assert [cmd["action"] for cmd in store.consume_commands()] == ["remove_pending"]
+    assert not store.has_pending_commands()
+
+    with open(store.command_path, "ab") as fh:
+        fh.write(b'{"action": "trun')
+    assert store.has_pending_commands()  # documented false positive for a partial line
+    assert store.consume_commands() == []
+    assert not store.has_pending_commands()
+
+
+def test_legacy_commands_json_is_drained_on_startup(tmp_path: Path) -> None:
+    state_dir = tmp_path / ".exp_state"
+    state_dir.mkdir()
+    legacy = [SchedulerCommand(action="retry_error", payload={"id": "t1"}).to_dict()]
+    (state_dir / "commands.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    store = SchedulerStateStore(tmp_path)
+
+    assert not (state_dir / "commands.json").exists()
+    assert store.has_pending_commands()
+    assert store.consume_commands() == legacy
+
+
+def test_resolve_log_path_falls_back_to_latest_log(session: SchedulerUISession) -> None:
+    work_dir = session.base_dir / "demo"
+    terminal_dir = work_dir / "terminal_logs"
+    terminal_dir.mkdir(parents=True)
+    for idx, name in enumerate(["run_0002.log", "run_0001.log", "notes.txt"]):
+        path = terminal_dir / name
+        path.write_text(name, encoding="utf-8")
+        os.utime(path, ns=(idx * 10**9, idx * 10**9))
+
+    assert session._resolve_log_path(work_dir, "run_0002") == terminal_dir / "run_0002.log"
+    assert session._resolve_log_path(work_dir, "missing") == terminal_dir / "run_0001.log"
+    assert [item["name"] for item in session._list_terminal_logs(work_dir)] == ["run_0001.log", "run_0002.log"]
+    assert session._resolve_log_path(session.base_dir / "empty", None) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_log_reopens_replaced_log(session: SchedulerUISession) -> None:
+    work_dir = session.base_dir / "demo_2025-09-27__12-00-00"
+    (work_dir / "terminal_logs").mkdir(parents=True, exist_ok=True)
+    log_path = work_dir / "terminal_logs" / "run_0001.log"
+    log_path.write_text("old line\n", encoding="utf-8")
+
+    record = _build_state_record(work_dir)
+    session.state_store.write_state(pending=[], running=[record], finished=[], errors=[], summary={})
+
+    appended: list[list[str]] = []
+
+    async def collector(message: dict) -> None:
+        if message.get("event") == "append":
+            appended.append(message["lines"])
+            if len(appended) == 2:
+                raise asyncio.CancelledError
+
+    async def rotate() -> None:
+        await asyncio.sleep(0.3)
+        replacement = log_path.with_suffix(".tmp")
+        replacement.write_text("new line\n", encoding="utf-8")
+        os.replace(replacement, log_path)
+
+    producer = asyncio.create_task(session.stream_log("task-0001", None, collector))
+    modifier = asyncio.create_task(rotate())
+
+    with pytest.raises(asyncio.CancelledError):
+        await producer
+    await modifier
+    assert appended == [["old line"], ["new line"]]
+
+
+@pytest.mark.asyncio
+async def test_log_change_events_use_short_debounce_and_timeout_fallback(tmp_path: Path) -> None:
+    calls = []
+
+    async def fake_awatch(*paths, **kwargs):
+        calls.append(kwargs)
+        yield set()  # what watchfiles yields on rust_timeout when yield_on_timeout=True
+
+    with patch("experiment_manager.ui.service.awatch", fake_awatch):
+        events = SchedulerUISession._log_change_events(tmp_path / "run_0001.log")
+        await events.__anext__()  # initial read
+        await events.__anext__()  # timeout tick from watchfiles
+        await events.aclose()
+
+    assert calls[0]["debounce"] < 1000 and calls[0]["step"] < 1000
+    assert calls[0]["rust_timeout"] == 1000 and calls[0]["yield_on_timeout"] is True
+
+
+def test_find_task_uses_id_index_until_state_changes(session: SchedulerUISession, tmp_path: Path) -> None:
+    record = _build_state_record(tmp_path)
+    session.state_store.write_state(pending=[], running=[], finished=[record], errors=[], summary={})
+
+    assert session.find_task("task-0001") == ("finished", record)
+    index = session._task_index
+    assert session.find_task("task-0001")[0] == "finished"
+    assert session._task_index is index
+
+    session.state_store.write_state(pending=[], running=[], finished=[], errors=[record], summary={})
+    assert session.find_task("task-0001")[0] == "errors"
+    with pytest.raises(KeyError):
+        session.find_task("missing")
+
+
+def test_format_mtime_ns_matches_local_timestamp() -> None:
+    formatted = _format_mtime_ns(1_727_409_600_123_456_789)
+    assert formatted == "2024-09-27T12:00:00.123456+08:00"
+    assert datetime.fromisoformat(formatted).timestamp() == pytest.approx(1_727_409_600.123456)